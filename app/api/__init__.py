@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api import murshid, quran, hadith, spiritual, voice
+from app.api import murshid, quran, hadith, spiritual, voice, prayer
 
 api_router = APIRouter()
 
@@ -8,3 +8,4 @@ api_router.include_router(quran.router)
 api_router.include_router(hadith.router)
 api_router.include_router(spiritual.router)
 api_router.include_router(voice.router)
+api_router.include_router(prayer.router)
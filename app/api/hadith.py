@@ -19,14 +19,21 @@ async def explain_hadith(request: HadithExplainRequest):
     
     - **collection**: Hadith collection (bukhari, muslim, etc.)
     - **book_number**: Book number
+    - **hadith_number**: Specific hadith number (takes precedence over book_number)
     - **language**: Response language
     """
     try:
         # Fetch hadith
-        hadith_data = await hadith_service.get_hadith(
-            collection=request.collection,
-            book_number=request.book_number
-        )
+        if request.hadith_number is not None:
+            hadith_data = await hadith_service.get_hadith_by_number(
+                collection=request.collection,
+                hadith_number=request.hadith_number
+            )
+        else:
+            hadith_data = await hadith_service.get_hadith(
+                collection=request.collection,
+                book_number=request.book_number
+            )
         
         if not hadith_data:
             raise HTTPException(status_code=404, detail="Hadith not found")
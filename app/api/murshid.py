@@ -1,10 +1,17 @@
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
+from app.config import settings
 from app.models.schemas import (
     ChatRequest, ChatResponse,
-    DailyNaseehahResponse, ErrorResponse
+    DailyNaseehahResponse, ErrorResponse, LanguageEnum
 )
 from app.services.openai_service import OpenAIService
+from app.services.naseehah_scheduler import naseehah_scheduler
+from app.services.session_store import session_store
 from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,6 +21,13 @@ router = APIRouter(prefix="/murshid", tags=["AI Murshid"])
 # Initialize service
 openai_service = OpenAIService()
 
+async def _conversation(request: ChatRequest) -> Tuple[Optional[str], List[Dict]]:
+    """Session ID and history for a chat request"""
+    if not request.session_id and request.conversation_history:
+        # Older clients that still upload their own history; newest turns only
+        return None, request.conversation_history[-settings.LEGACY_HISTORY_MAX_TURNS:]
+    return await session_store.open(request.user_id, request.session_id)
+
 @router.post("/chat", response_model=ChatResponse)
 async def chat_with_murshid(request: ChatRequest):
     """
@@ -21,46 +35,129 @@ async def chat_with_murshid(request: ChatRequest):
     
     - **message**: Your question or message
     - **language**: Response language (en, ur, hi, ar, bn)
-    - **conversation_history**: Optional previous messages for context
+    - **session_id**: Session returned by an earlier reply; omit to start a new one
+    - **conversation_history**: Deprecated, only used without session_id
+    
+    History is kept on the server per user_id and session_id, so send only
+    the new message and the session_id from the previous response.
     """
     try:
+        session_id, history = await _conversation(request)
+        
         result = await openai_service.chat_with_murshid(
             message=request.message,
             language=request.language,
-            conversation_history=request.conversation_history
+            conversation_history=history
         )
         
         if not result.get("success"):
             raise HTTPException(status_code=500, detail="AI service error")
         
+        if session_id:
+            await session_store.record(request.user_id, session_id, request.message, result["response"])
+        
         return ChatResponse(
             response=result["response"],
             language=request.language,
             timestamp=datetime.now().isoformat(),
-            tokens_used=result.get("tokens_used")
+            tokens_used=result.get("tokens_used"),
+            prompt_tokens=result.get("prompt_tokens"),
+            completion_tokens=result.get("completion_tokens"),
+            session_id=session_id
         )
         
     except Exception as e:
         logger.error(f"Chat endpoint error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _sse(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@router.post("/chat/stream")
+async def chat_with_murshid_stream(request: ChatRequest):
+    """
+    Chat with AI Murshid, streamed as Server-Sent Events
+    
+    Same body as /chat. Emits `token` events ({"content": ...}) as text is
+    generated, then one `done` event with tokens_used, ttft_ms, session_id,
+    language and timestamp. A failure mid-stream is sent as an `error` event
+    and the exchange is not added to the session. Closing the connection
+    cancels the upstream request.
+    """
+    session_id, history = await _conversation(request)
+    events = openai_service.stream_chat_with_murshid(
+        message=request.message,
+        language=request.language,
+        conversation_history=history
+    )
+    
+    # Wait for the first event so upstream failures still return a 500
+    try:
+        first = await events.__anext__()
+    except Exception as e:
+        logger.error(f"Chat stream endpoint error: {str(e)}")
+        raise HTTPException(status_code=500, detail="AI service error")
+    
+    async def body() -> AsyncIterator[str]:
+        event = first
+        reply = []
+        try:
+            while True:
+                if event["type"] == "token":
+                    reply.append(event["content"])
+                    yield _sse("token", {"content": event["content"]})
+                else:
+                    if session_id:
+                        await session_store.record(request.user_id, session_id, request.message, "".join(reply))
+                    yield _sse("done", {
+                        "tokens_used": event["tokens_used"],
+                        "prompt_tokens": event["prompt_tokens"],
+                        "completion_tokens": event["completion_tokens"],
+                        "ttft_ms": event["ttft_ms"],
+                        "session_id": session_id,
+                        "language": request.language,
+                        "timestamp": datetime.now().isoformat()
+                    })
+                event = await events.__anext__()
+        except StopAsyncIteration:
+            pass
+        except Exception:
+            yield _sse("error", {"detail": "AI service error"})
+        finally:
+            await events.aclose()
+    
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/daily-naseehah", response_model=DailyNaseehahResponse)
-async def get_daily_naseehah(language: str = "en"):
+async def get_daily_naseehah(language: LanguageEnum = LanguageEnum.ENGLISH, tz: str = "UTC"):
     """
     Get daily spiritual advice (Naseehah)
     
-    - **language**: Response language
+    - **language**: Response language (en, ur, hi, ar, bn)
+    - **tz**: IANA timezone used to pick the day, e.g. Asia/Dhaka (default UTC)
     """
     try:
-        result = await openai_service.generate_daily_naseehah(language=language)
+        try:
+            today = datetime.now(ZoneInfo(tz)).date()
+        except (ZoneInfoNotFoundError, ValueError):
+            raise HTTPException(status_code=400, detail=f"Unknown timezone: {tz}")
+        
+        # Pre-generated by the scheduler; generated once here on a cold start
+        result = await naseehah_scheduler.ensure(today, language.value)
         
         return DailyNaseehahResponse(
             naseehah=result["naseehah"],
             reference=result.get("reference"),
-            language=language,
-            date=datetime.now().date().isoformat()
+            language=language.value,
+            date=today.isoformat()
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Daily naseehah error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,218 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import JSONResponse
+from app.config import settings
+from app.models.schemas import QiblaBatchRequest
+from app.services.prayer_times import (
+    METHODS, ANGLE_BASED, prayer_timetable, resolve_timezone
+)
+from app.services.qibla import KAABA_LATITUDE, KAABA_LONGITUDE, qibla_direction
+from app.services.gazetteer import gazetteer
+from calendar import monthrange
+from datetime import date, datetime, tzinfo
+from typing import Dict, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/prayer", tags=["Prayer Times"])
+
+def _location(
+    latitude: Optional[float],
+    longitude: Optional[float],
+    city: Optional[str],
+    country: Optional[str],
+    tz: Optional[str]
+) -> Tuple[float, float, tzinfo, Optional[Dict]]:
+    """
+    (latitude, longitude, timezone, city) from coordinates or a city name
+    
+    Cities are resolved from the bundled gazetteer and default to their own
+    timezone; coordinates default to the timezone of the nearest city.
+    Ambiguous names are answered with 409 and the candidates, unknown ones
+    with 404 and suggestions. Raises ValueError for an unknown country or
+    timezone.
+    """
+    if city:
+        status, cities = gazetteer.resolve(city, country)
+        candidates = [gazetteer.describe(c) for c in cities]
+        if status == "ambiguous":
+            raise HTTPException(status_code=409, detail={
+                "message": f"Several cities match '{city}'; add country or use coordinates",
+                "candidates": candidates
+            })
+        if status == "not_found":
+            raise HTTPException(status_code=404, detail={
+                "message": f"City not found: {city}",
+                "suggestions": candidates
+            })
+        place = candidates[0]
+        return place["latitude"], place["longitude"], resolve_timezone(tz or place["timezone"]), place
+    
+    if latitude is None or longitude is None:
+        raise HTTPException(status_code=400, detail="Give latitude and longitude, or city")
+    timezone = resolve_timezone(tz or gazetteer.nearest(latitude, longitude).timezone)
+    return latitude, longitude, timezone, None
+
+def _meta(
+    latitude: float,
+    longitude: float,
+    timezone: tzinfo,
+    method: int,
+    school: int,
+    latitude_adjustment: int,
+    place: Optional[Dict]
+) -> Dict:
+    return {
+        "latitude": latitude,
+        "longitude": longitude,
+        "city": place,
+        "timezone": str(timezone),
+        "method": {"id": method, "name": METHODS[method].name},
+        "school": "Hanafi" if school == 1 else "Standard",
+        "latitude_adjustment": latitude_adjustment
+    }
+
+@router.get("/times")
+async def get_prayer_times(
+    latitude: Optional[float] = Query(default=None, ge=-90, le=90),
+    longitude: Optional[float] = Query(default=None, ge=-180, le=180),
+    city: Optional[str] = Query(default=None, max_length=100, description="City name, instead of coordinates"),
+    country: Optional[str] = Query(default=None, max_length=100, description="Country name or ISO code, narrows city"),
+    date_: Optional[date] = Query(default=None, alias="date", description="YYYY-MM-DD, default today in tz"),
+    tz: Optional[str] = Query(default=None, description="IANA timezone, e.g. Asia/Dhaka"),
+    method: int = Query(default=settings.PRAYER_CALCULATION_METHOD, description="Aladhan calculation method ID"),
+    school: int = Query(default=0, description="Asr: 0 = Shafi'i/Maliki/Hanbali, 1 = Hanafi"),
+    latitude_adjustment: int = Query(default=ANGLE_BASED, description="High latitudes: 1 = middle of night, 2 = one seventh, 3 = angle based")
+):
+    """
+    Prayer times for a location and day, calculated locally
+    
+    - **latitude**, **longitude**: Location
+    - **city**, **country**: Or a city from the bundled gazetteer; an
+      ambiguous name returns 409 with the candidates
+    - **date**: Day to calculate (default: today)
+    - **tz**: Timezone of the returned times; defaults to the city's, or
+      for coordinates that of the nearest city in the gazetteer
+    - **method**, **school**, **latitude_adjustment**: Same IDs as Aladhan
+    """
+    try:
+        try:
+            latitude, longitude, timezone, place = _location(latitude, longitude, city, country, tz)
+            day = date_ or datetime.now(timezone).date()
+            result = prayer_timetable(
+                latitude, longitude, day, 1, timezone, method, school, latitude_adjustment
+            )[0]
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        return {
+            **result,
+            "meta": _meta(latitude, longitude, timezone, method, school, latitude_adjustment, place)
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Prayer times error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/timetable")
+async def get_prayer_timetable(
+    latitude: Optional[float] = Query(default=None, ge=-90, le=90),
+    longitude: Optional[float] = Query(default=None, ge=-180, le=180),
+    city: Optional[str] = Query(default=None, max_length=100, description="City name, instead of coordinates"),
+    country: Optional[str] = Query(default=None, max_length=100, description="Country name or ISO code, narrows city"),
+    year: int = Query(..., ge=1900, le=2200),
+    month: Optional[int] = Query(default=None, ge=1, le=12, description="Omit for the whole year"),
+    tz: Optional[str] = Query(default=None, description="IANA timezone, e.g. Asia/Dhaka"),
+    method: int = Query(default=settings.PRAYER_CALCULATION_METHOD, description="Aladhan calculation method ID"),
+    school: int = Query(default=0, description="Asr: 0 = Shafi'i/Maliki/Hanbali, 1 = Hanafi"),
+    latitude_adjustment: int = Query(default=ANGLE_BASED, description="High latitudes: 1 = middle of night, 2 = one seventh, 3 = angle based")
+):
+    """
+    Prayer timetable for a month or a whole year, calculated in one pass
+    
+    - **year**, **month**: Period to calculate; omit month for the full year
+    - Other parameters as for /prayer/times
+    """
+    try:
+        if month:
+            start, days = date(year, month, 1), monthrange(year, month)[1]
+        else:
+            start, days = date(year, 1, 1), (date(year + 1, 1, 1) - date(year, 1, 1)).days
+        
+        try:
+            latitude, longitude, timezone, place = _location(latitude, longitude, city, country, tz)
+            timetable = prayer_timetable(
+                latitude, longitude, start, days, timezone, method, school, latitude_adjustment
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        return {
+            "days": timetable,
+            "meta": _meta(latitude, longitude, timezone, method, school, latitude_adjustment, place)
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Prayer timetable error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/cities")
+async def search_cities(
+    q: str = Query(..., min_length=1, max_length=100, description="Beginning of a city name"),
+    country: Optional[str] = Query(default=None, max_length=100, description="Country name or ISO code"),
+    limit: int = Query(default=10, ge=1, le=50)
+):
+    """
+    Autocomplete city names from the bundled gazetteer
+    
+    Matches ignore case and accents; the most populous cities come first.
+    Each result carries coordinates and timezone for /prayer/times.
+    """
+    try:
+        cities = gazetteer.autocomplete(q, country, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {"cities": [gazetteer.describe(city) for city in cities]}
+
+@router.get("/qibla")
+async def get_qibla(
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180)
+):
+    """
+    Qibla direction for a location
+    
+    Returns the great-circle bearing to the Kaaba in degrees clockwise
+    from true north, the same value as Aladhan's /qibla.
+    """
+    return {
+        "latitude": latitude,
+        "longitude": longitude,
+        "direction": qibla_direction(latitude, longitude),
+        "kaaba": {"latitude": KAABA_LATITUDE, "longitude": KAABA_LONGITUDE}
+    }
+
+@router.post("/qibla/batch")
+async def get_qibla_batch(request: QiblaBatchRequest):
+    """
+    Qibla directions for up to 10,000 locations in one call
+    
+    - **latitudes**, **longitudes**: Parallel lists of coordinates
+    
+    Returns `directions` in the same order, in degrees from true north.
+    """
+    if len(request.latitudes) != len(request.longitudes):
+        raise HTTPException(status_code=400, detail="latitudes and longitudes must have the same length")
+    
+    try:
+        directions = qibla_direction(request.latitudes, request.longitudes)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # Plain floats straight to JSON, skipping per-item encoding
+    return JSONResponse({"count": len(directions), "directions": directions.tolist()})
@@ -1,7 +1,9 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from app.models.schemas import QuranExplainRequest, QuranResponse
 from app.services.quran_service import QuranService
 from app.services.openai_service import OpenAIService
+from typing import Optional
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -25,33 +27,35 @@ async def explain_verse(request: QuranExplainRequest):
         # Get translation ID for language
         translation_id = quran_service.get_translation_id(request.language)
         
-        # Fetch verse from Quran API
-        if request.ayah_number:
+        # Surah info does not depend on the verse, fetch it alongside the
+        # verse and the explanation instead of after them
+        surah_task = asyncio.create_task(
+            quran_service.get_surah_info(request.surah_number)
+        )
+        
+        try:
+            # Fetch verse from Quran API (first verse of Surah if no ayah given)
             verse_data = await quran_service.get_verse(
                 surah_number=request.surah_number,
-                ayah_number=request.ayah_number,
+                ayah_number=request.ayah_number or 1,
                 translation_id=translation_id
             )
-        else:
-            # Get first verse of Surah
-            verse_data = await quran_service.get_verse(
-                surah_number=request.surah_number,
-                ayah_number=1,
-                translation_id=translation_id
+            
+            if not verse_data:
+                raise HTTPException(status_code=404, detail="Verse not found")
+            
+            # Get AI explanation
+            explanation = await openai_service.explain_quran_verse(
+                verse=verse_data["arabic_text"],
+                translation=verse_data["translation"],
+                language=request.language
             )
+            
+            # Get Surah info
+            surah_info = await surah_task
+        finally:
+            surah_task.cancel()
         
-        if not verse_data:
-            raise HTTPException(status_code=404, detail="Verse not found")
-        
-        # Get AI explanation
-        explanation = await openai_service.explain_quran_verse(
-            verse=verse_data["arabic_text"],
-            translation=verse_data["translation"],
-            language=request.language
-        )
-        
-        # Get Surah info
-        surah_info = await quran_service.get_surah_info(request.surah_number)
         surah_name = surah_info.get("name_simple", f"Surah {request.surah_number}") if surah_info else f"Surah {request.surah_number}"
         
         return QuranResponse(
@@ -91,16 +95,32 @@ async def get_surah_info(surah_number: int):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/search")
-async def search_quran(query: str, language: str = "en"):
-    """Search Quran by keyword"""
+async def search_quran(
+    query: str,
+    language: str = "en",
+    limit: int = Query(default=10, ge=1, le=50),
+    cursor: Optional[str] = None
+):
+    """
+    Search Quran by keyword
+    
+    - **query**: Words to search, use "double quotes" for an exact phrase
+    - **language**: Search the translation for this language (ar = Arabic text)
+    - **limit**: Results per page
+    - **cursor**: next_cursor from the previous page
+    """
     try:
-        results = await quran_service.search_quran(query, language)
+        results = await quran_service.search_quran(query, language, limit=limit, cursor=cursor)
         
         if results is None:
             raise HTTPException(status_code=500, detail="Search failed")
         
-        return {"query": query, "results": results}
+        return {"query": query, **results}
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Quran search error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -5,6 +5,8 @@ from app.models.schemas import (
 )
 from app.services.openai_service import OpenAIService
 from app.services.elevenlabs_service import ElevenLabsService
+from app.services.audio_library import audio_library, slugify, zikr_phrase
+from app.utils.zikr import ZIKR_REFERENCES, ZIKR_SUGGESTIONS
 import logging
 
 logger = logging.getLogger(__name__)
@@ -90,40 +92,26 @@ async def get_zikr_suggestions(mood: str = "general", language: str = "en"):
     - **language**: Response language
     """
     try:
-        # Predefined Zikr recommendations
-        zikr_map = {
-            "peaceful": [
-                "SubhanAllah (100 times)",
-                "Alhamdulillah (100 times)",
-                "La ilaha illallah (100 times)"
-            ],
-            "anxious": [
-                "La hawla wa la quwwata illa billah",
-                "Hasbunallahu wa ni'mal wakeel (70 times)",
-                "Ayatul Kursi (3 times)"
-            ],
-            "grateful": [
-                "Alhamdulillah (100 times)",
-                "Shukran lillah (continuous)",
-                "Surah Al-Fatihah (7 times)"
-            ],
-            "repentant": [
-                "Astaghfirullah (100 times)",
-                "Rabbi la tazarni fardan (11 times)",
-                "Durood Sharif (100 times)"
-            ],
-            "general": [
-                "SubhanAllah (33 times)",
-                "Alhamdulillah (33 times)",
-                "Allahu Akbar (34 times)"
-            ]
-        }
+        zikr_list = ZIKR_SUGGESTIONS.get(mood.lower(), ZIKR_SUGGESTIONS["general"])
         
-        zikr_list = zikr_map.get(mood.lower(), zikr_map["general"])
+        # Pre-rendered recitation of each phrase, None if not rendered yet.
+        # Suggestions naming a longer text link to its recitation, if any.
+        audio_urls = []
+        for zikr in zikr_list:
+            phrase = zikr_phrase(zikr)
+            if phrase in ZIKR_REFERENCES:
+                item = ZIKR_REFERENCES[phrase]
+            else:
+                item = ("zikr", slugify(phrase))
+            rendered = item and audio_library.lookup_item(*item, "calm", language)
+            audio_urls.append(
+                f"/api/voice/library/{item[0]}/{item[1]}?voice_style=calm&language={language}" if rendered else None
+            )
         
         return {
             "mood": mood,
             "zikr_suggestions": zikr_list,
+            "audio_urls": audio_urls,
             "language": language,
             "note": "Recite with full presence and sincerity"
         }
@@ -1,13 +1,18 @@
 from fastapi import APIRouter, HTTPException, File, UploadFile
-from fastapi.responses import Response
-from app.models.schemas import VoiceGenerateRequest, LanguageEnum, VoiceStyleEnum
-from typing import Optional
+from fastapi.responses import FileResponse, StreamingResponse
+from app.models.schemas import VoiceGenerateRequest, LanguageEnum, VoiceStyleEnum, VoiceResponseModeEnum
+from typing import AsyncIterator, Dict, List, Optional
 from fastapi import Query
 from app.services.elevenlabs_service import ElevenLabsService
 from app.services.openai_service import OpenAIService
+from app.services.voice_pipeline import VoicePipeline
+from app.services.audio_store import audio_store
+from app.services.audio_library import audio_library
+from app.services.session_store import session_store
+from urllib.parse import quote
+import json
 import logging
-import base64
-from openai import OpenAI
+import secrets
 from app.config import settings
 
 logger = logging.getLogger(__name__)
@@ -17,7 +22,7 @@ router = APIRouter(prefix="/voice", tags=["Voice"])
 # Initialize services
 elevenlabs_service = ElevenLabsService()
 openai_service = OpenAIService()
-whisper_client = OpenAI(api_key=settings.OPENAI_API_KEY)
+voice_pipeline = VoicePipeline(openai_service, elevenlabs_service)
 
 @router.post("/generate")
 async def generate_voice(
@@ -32,47 +37,238 @@ async def generate_voice(
     - **voice_style**: Voice style (calm, wise, gentle)
     - **speed**: Reading speed (0.5=very slow, 0.85=slow, 1.0=normal, 1.5=fast)
     
-    Returns: Downloadable MP3 file
+    Returns: Downloadable MP3 file, streamed while it is synthesized
     
     **For Arabic/Quranic text, use speed=0.7 for recitation-like pace**
     """
+    logger.info(f"Generating voice for text: {request.text[:50]}... (speed: {speed})")
+    
+    filename = f"voice_{request.language.value}_speed{speed}.mp3"
+    
+    # Audio synthesized before is sent straight from the TTS cache file
+    cached = elevenlabs_service.cached_speech(
+        text=request.text,
+        voice_style=request.voice_style.value,
+        language=request.language.value,
+        speed=speed
+    )
+    if cached is not None:
+        return FileResponse(cached, media_type="audio/mpeg", filename=filename)
+    
+    audio = elevenlabs_service.stream_speech(
+        text=request.text,
+        voice_style=request.voice_style.value,
+        language=request.language.value,
+        speed=speed
+    )
+    
+    # Wait for the first chunk so provider errors still return a 500
     try:
-        logger.info(f"Generating voice for text: {request.text[:50]}... (speed: {speed})")
-        
-        result = await elevenlabs_service.text_to_speech(
-            text=request.text,
-            voice_style=request.voice_style,
-            language=request.language,
-            speed=speed
-        )
-        
-        if not result.get("success"):
-            raise HTTPException(status_code=500, detail="Voice generation failed")
-        
-        # Decode base64 to bytes
-        audio_bytes = base64.b64decode(result['audio_base64'])
-        
-        logger.info("Voice generated successfully")
-        
-        # Return as downloadable MP3 file
-        return Response(
-            content=audio_bytes,
-            media_type="audio/mpeg",
-            headers={
-                "Content-Disposition": f"attachment; filename=voice_{request.language}_speed{speed}.mp3"
-            }
-        )
-        
+        first_chunk = await audio.__anext__()
+    except StopAsyncIteration:
+        first_chunk = b""
     except Exception as e:
         logger.error(f"Voice generation error: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=500, detail="Voice generation failed")
+    
+    async def body() -> AsyncIterator[bytes]:
+        try:
+            yield first_chunk
+            async for chunk in audio:
+                yield chunk
+            logger.info("Voice generated successfully")
+        finally:
+            await audio.aclose()
+    
+    # Raw MP3 bytes are forwarded as ElevenLabs produces them
+    return StreamingResponse(
+        body(),
+        media_type="audio/mpeg",
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}"
+        }
+    )
+
+
+async def _stream_voice_reply(
+    user_message: str,
+    language: LanguageEnum,
+    speed: float,
+    user_id: Optional[str],
+    session_id: str,
+    history: List[Dict]
+) -> StreamingResponse:
+    """Stream the spoken reply sentence by sentence while the LLM is still writing it"""
+    events = voice_pipeline.stream(
+        message=user_message,
+        language=language.value,
+        speed=speed,
+        conversation_history=history
+    )
+    
+    # Hold the response until the first audio arrives so failures still return a 500
+    first_audio = None
+    try:
+        async for event in events:
+            if event["type"] in ("audio", "done"):
+                first_audio = event
+                break
+    except Exception as e:
+        logger.error(f"Voice chat stream error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Voice generation failed")
+    
+    async def body() -> AsyncIterator[bytes]:
+        try:
+            event = first_audio
+            if event and event["type"] == "audio":
+                yield event["data"]
+                async for event in events:
+                    if event["type"] == "audio":
+                        yield event["data"]
+            if event and event["type"] == "done":
+                await session_store.record(user_id, session_id, user_message, event["text"])
+            logger.info("Voice chat stream completed")
+        except Exception as e:
+            # Headers are already sent; end the audio early
+            logger.error(f"Voice chat stream error: {str(e)}")
+        finally:
+            await events.aclose()
+    
+    return StreamingResponse(
+        body(),
+        media_type="audio/mpeg",
+        headers={
+            "X-User-Message": quote(user_message),
+            "X-Session-Id": session_id,
+            "X-Language": language.value,
+            "X-Speed": str(speed)
+        }
+    )
+
+
+async def _multipart_voice_reply(
+    metadata: Dict,
+    response_text: str,
+    language: LanguageEnum,
+    speed: float
+) -> StreamingResponse:
+    """JSON metadata part followed by the raw MP3 part, streamed as it is synthesized"""
+    audio = elevenlabs_service.stream_speech(
+        text=response_text,
+        voice_style="calm",
+        language=language.value,
+        speed=speed
+    )
+    
+    # Wait for the first chunk so provider errors still return a 500
+    try:
+        first_chunk = await audio.__anext__()
+    except StopAsyncIteration:
+        first_chunk = b""
+    except Exception as e:
+        logger.error(f"Voice chat TTS error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Voice generation failed")
+    
+    boundary = secrets.token_hex(16)
+    
+    async def body() -> AsyncIterator[bytes]:
+        try:
+            yield (
+                f"--{boundary}\r\n"
+                "Content-Type: application/json; charset=utf-8\r\n\r\n"
+                f"{json.dumps(metadata, ensure_ascii=False)}\r\n"
+                f"--{boundary}\r\n"
+                "Content-Type: audio/mpeg\r\n"
+                f"Content-Disposition: attachment; filename=\"reply_{language.value}.mp3\"\r\n\r\n"
+            ).encode("utf-8")
+            yield first_chunk
+            async for chunk in audio:
+                yield chunk
+            yield f"\r\n--{boundary}--\r\n".encode("utf-8")
+        finally:
+            await audio.aclose()
+    
+    return StreamingResponse(body(), media_type=f"multipart/mixed; boundary={boundary}")
+
+
+@router.get("/audio/{audio_id}")
+async def get_voice_audio(audio_id: str):
+    """
+    Fetch audio generated by voice chat with mode=audio_id
+    
+    - **audio_id**: ID from the voice chat response (expires after a few minutes)
+    """
+    path = audio_store.path(audio_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Audio not found or expired")
+    
+    return FileResponse(path, media_type="audio/mpeg", filename=f"{audio_id}.mp3")
+
+
+@router.get("/library")
+async def list_audio_library(
+    kind: Optional[str] = None,
+    voice_style: Optional[VoiceStyleEnum] = None,
+    language: Optional[LanguageEnum] = None
+):
+    """
+    List pre-rendered audio (zikr, names, fatiha, naseehah)
+    
+    - **kind**: Optional content kind filter
+    - **voice_style**: Optional voice style filter
+    - **language**: Optional language filter
+    """
+    entries = audio_library.entries(
+        kind=kind,
+        voice_style=voice_style.value if voice_style else None,
+        language=language.value if language else None
+    )
+    
+    return {
+        "items": [
+            {
+                **entry,
+                "audio_url": f"/api/voice/library/{entry['kind']}/{entry['slug']}"
+                             f"?voice_style={entry['voice_style']}&language={entry['language']}"
+            }
+            for entry in entries
+        ],
+        "total": len(entries)
+    }
+
+
+@router.get("/library/{kind}/{slug}")
+async def get_library_audio(
+    kind: str,
+    slug: str,
+    voice_style: VoiceStyleEnum = VoiceStyleEnum.CALM,
+    language: LanguageEnum = LanguageEnum.ENGLISH
+):
+    """
+    Pre-rendered MP3 from the audio library
+    
+    - **kind**: zikr, names, fatiha or naseehah
+    - **slug**: Item within the kind (e.g. subhanallah, 1, arabic, 2026-01-01)
+    """
+    path = audio_library.lookup_item(kind, slug, voice_style.value, language.value)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Audio not pre-rendered")
+    
+    return FileResponse(
+        path,
+        media_type="audio/mpeg",
+        filename=f"{kind}_{slug}_{voice_style.value}_{language.value}.mp3"
+    )
 
 
 @router.post("/chat")
 async def voice_chat(
     audio: UploadFile = File(..., description="Audio file (MP3, WAV, M4A)"),
     language: LanguageEnum = Query(default=LanguageEnum.ENGLISH, description="Response language - Select from dropdown"),
-    response_speed: Optional[float] = Query(default=0.85, ge=0.5, le=1.5, description="Voice speed (0.5-1.5)")
+    response_speed: Optional[float] = Query(default=0.85, ge=0.5, le=1.5, description="Voice speed (0.5-1.5)"),
+    mode: VoiceResponseModeEnum = Query(default=VoiceResponseModeEnum.JSON, description="json, stream, multipart or audio_id"),
+    user_id: Optional[str] = Query(default=None, description="User ID for the session"),
+    session_id: Optional[str] = Query(default=None, max_length=64, pattern=r"^[A-Za-z0-9_-]+$", description="Session to continue; omit to start a new one")
 ):
     """
     Voice chat with AI Murshid
@@ -90,6 +286,9 @@ async def voice_chat(
     - **audio**: Your voice/audio file
     - **language**: Response language (en, ur, ar, hi, bn)
     - **response_speed**: Voice speed (0.5-1.5, default: 0.85 = slow & clear)
+    - **mode**: `json` (default), `stream`, `multipart` or `audio_id`
+    - **user_id**, **session_id**: Continue a conversation; the reply carries
+      the session_id to send with the next message
     
     **For Arabic responses, use 0.7 for Quranic recitation pace**
     
@@ -98,31 +297,52 @@ async def voice_chat(
     - ai_response: AI Murshid's text response
     - audio_base64: AI response in audio format (base64)
     - download_url: Data URL to play/download audio
+    
+    With mode=stream the body is MP3 audio instead. The reply is spoken
+    sentence by sentence while it is being generated, so audio starts about
+    one sentence after the LLM starts answering. The transcription is in
+    the URL-encoded `X-User-Message` header and the session in `X-Session-Id`.
+    
+    With mode=multipart the body is multipart/mixed: a JSON part with the
+    fields above minus the audio, then the raw MP3 part. With mode=audio_id
+    the JSON carries `audio_url` instead of base64 audio; fetch it from
+    GET /voice/audio/{audio_id} before it expires.
     """
     try:
-        # Step 1: Read uploaded audio
-        audio_bytes = await audio.read()
-        logger.info(f"Received audio file: {audio.filename} ({len(audio_bytes)} bytes)")
+        # Step 1: Check uploaded audio
+        # The body is spooled to a temp file by the form parser and capped by
+        # BodySizeLimitMiddleware, so it is never held in memory here
+        if audio.size is not None and audio.size > settings.VOICE_UPLOAD_MAX_BYTES:
+            raise HTTPException(status_code=413, detail="Audio file too large")
+        
+        logger.info(f"Received audio file: {audio.filename} ({audio.size} bytes)")
         
         # Step 2: Transcribe audio to text (Whisper)
         logger.info("Transcribing audio with Whisper...")
         
-        temp_filename = f"temp_audio.{audio.filename.split('.')[-1]}"
+        temp_filename = f"temp_audio.{(audio.filename or 'audio.mp3').split('.')[-1]}"
         
-        transcription = whisper_client.audio.transcriptions.create(
-            model="whisper-1",
-            file=(temp_filename, audio_bytes, audio.content_type)
+        user_message = await openai_service.transcribe_audio(
+            file=audio.file,
+            filename=temp_filename,
+            content_type=audio.content_type
         )
-        
-        user_message = transcription.text
         logger.info(f"Transcribed: {user_message}")
         
+        session_id, history = await session_store.open(user_id, session_id)
+        
+        if mode == VoiceResponseModeEnum.STREAM:
+            return await _stream_voice_reply(
+                user_message, language, response_speed, user_id, session_id, history
+            )
+        
         # Step 3: Get AI Murshid response
         logger.info("Getting AI Murshid response...")
         
         chat_result = await openai_service.chat_with_murshid(
             message=user_message,
-            language=language.value  # Convert enum to string
+            language=language.value,  # Convert enum to string
+            conversation_history=history
         )
         
         if not chat_result.get("success"):
@@ -130,10 +350,41 @@ async def voice_chat(
         
         response_text = chat_result["response"]
         logger.info(f"AI response generated ({len(response_text)} chars)")
+        await session_store.record(user_id, session_id, user_message, response_text)
+        
+        metadata = {
+            "user_message": user_message,
+            "ai_response": response_text,
+            "language": language.value,
+            "speed": response_speed,
+            "tokens_used": chat_result.get("tokens_used"),
+            "prompt_tokens": chat_result.get("prompt_tokens"),
+            "completion_tokens": chat_result.get("completion_tokens"),
+            "session_id": session_id
+        }
         
         # Step 4: Convert AI response to voice (SLOW pace)
         logger.info(f"Converting response to voice (speed: {response_speed})...")
         
+        if mode == VoiceResponseModeEnum.MULTIPART:
+            return await _multipart_voice_reply(metadata, response_text, language, response_speed)
+        
+        if mode == VoiceResponseModeEnum.AUDIO_ID:
+            audio_id = await audio_store.save(elevenlabs_service.stream_speech(
+                text=response_text,
+                voice_style="calm",
+                language=language.value,
+                speed=response_speed
+            ))
+            logger.info("Voice chat completed successfully")
+            return {
+                **metadata,
+                "audio_id": audio_id,
+                "audio_url": f"/api/voice/audio/{audio_id}",
+                "expires_in": settings.VOICE_AUDIO_TTL_SECONDS,
+                "success": True
+            }
+        
         voice_result = await elevenlabs_service.text_to_speech(
             text=response_text,
             voice_style="calm",
@@ -156,9 +407,14 @@ async def voice_chat(
             "language": language.value,  # Return string value
             "speed": response_speed,
             "tokens_used": chat_result.get("tokens_used"),
+            "prompt_tokens": chat_result.get("prompt_tokens"),
+            "completion_tokens": chat_result.get("completion_tokens"),
+            "session_id": session_id,
             "success": True
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Voice chat error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
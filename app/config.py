@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Dict, List
 
 class Settings(BaseSettings):
     # API Keys
@@ -11,6 +12,77 @@ class Settings(BaseSettings):
     HADITH_API_URL: str = "https://cdn.jsdelivr.net/gh/fawazahmed0/hadith-api@1"
     ALADHAN_API_URL: str = "https://api.aladhan.com/v1"
     
+    # Local prayer-time calculation (Aladhan method IDs, 2 = ISNA)
+    PRAYER_CALCULATION_METHOD: int = 2
+    
+    # Local Quran corpus (python -m app.services.quran_store import)
+    QURAN_DATA_DIR: str = "data/quran"
+    
+    # Hadith book cache (memory LRU + disk with ETag revalidation)
+    HADITH_CACHE_DIR: str = "data/hadith"
+    HADITH_CACHE_MEMORY_BYTES: int = 64 * 1024 * 1024
+    HADITH_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    # Hadith number index (python -m app.services.hadith_index build)
+    HADITH_INDEX_DIR: str = "data/hadith-index"
+    
+    # Upstream HTTP connection pools (shared per upstream)
+    HTTP2_ENABLED: bool = True
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP_CONNECT_TIMEOUT: float = 5.0
+    HTTP_READ_TIMEOUT: float = 10.0
+    HTTP_POOL_TIMEOUT: float = 5.0
+    
+    # OpenAI client
+    OPENAI_MODEL: str = "gpt-4-turbo-preview"  # or "gpt-4" or "gpt-3.5-turbo"
+    OPENAI_TIMEOUT: float = 60.0
+    OPENAI_MAX_RETRIES: int = 2
+    OPENAI_MAX_CONCURRENCY: int = 500
+    # Per-endpoint in-flight caps, e.g. {"chat": 300, "meditation": 50}
+    OPENAI_ENDPOINT_CONCURRENCY: Dict[str, int] = {}
+    
+    # Cache of Quran/Hadith explanations (SQLite + in-process LRU)
+    LLM_CACHE_PATH: str = "data/llm_cache.sqlite3"
+    LLM_CACHE_TTL_SECONDS: int = 30 * 24 * 3600
+    LLM_CACHE_MEMORY_ENTRIES: int = 2048
+    
+    # Chat history sent with each turn (older turns are summarized)
+    HISTORY_TOKEN_BUDGET: int = 1500
+    HISTORY_SUMMARY_BLOCK_TURNS: int = 4
+    HISTORY_SUMMARY_MAX_TOKENS: int = 200
+    HISTORY_SUMMARY_INPUT_TOKENS: int = 2000
+    
+    # Server-side chat sessions
+    SESSION_DB_PATH: str = "data/sessions.sqlite3"
+    SESSION_IDLE_SECONDS: int = 1800
+    SESSION_MAX_TURNS: int = 200
+    SESSION_RETENTION_DAYS: int = 30
+    LEGACY_HISTORY_MAX_TURNS: int = 20
+    
+    # Precomputed daily naseehah
+    NASEEHAH_STORE_PATH: str = "data/naseehah.json"
+    NASEEHAH_REFRESH_SECONDS: int = 3600
+    
+    # Voice chat uploads and Whisper transcription
+    VOICE_UPLOAD_MAX_BYTES: int = 25 * 1024 * 1024  # Whisper's own file limit
+    WHISPER_MODEL: str = "whisper-1"
+    WHISPER_TIMEOUT: float = 60.0
+    
+    # ElevenLabs text-to-speech
+    ELEVENLABS_API_URL: str = "https://api.elevenlabs.io/v1"
+    ELEVENLABS_MODEL: str = "eleven_multilingual_v2"
+    ELEVENLABS_OUTPUT_FORMAT: str = "mp3_44100_128"
+    ELEVENLABS_TIMEOUT: float = 60.0
+    ELEVENLABS_MAX_CONCURRENCY: int = 20
+    TTS_STREAM_CHUNK_SIZE: int = 16384
+    TTS_CACHE_DIR: str = "data/tts-cache"
+    TTS_CACHE_MAX_BYTES: int = 1024 * 1024 * 1024
+    AUDIO_LIBRARY_DIR: str = "data/audio-library"
+    VOICE_PIPELINE_LOOKAHEAD: int = 3  # Sentences synthesized ahead in streamed voice chat
+    VOICE_AUDIO_DIR: str = "data/voice-audio"
+    VOICE_AUDIO_TTL_SECONDS: int = 600
+    
     # App Settings
     APP_NAME: str = "Digital Khanqah Al Murshid API"
     APP_VERSION: str = "1.0.0"
@@ -19,6 +91,12 @@ class Settings(BaseSettings):
     # Rate Limits
     FREE_TIER_DAILY_LIMIT: int = 10
     PREMIUM_TIER_DAILY_LIMIT: int = 1000
+    FREE_TIER_PER_MINUTE: int = 5
+    PREMIUM_TIER_PER_MINUTE: int = 60
+    PREMIUM_API_KEYS: List[str] = []  # Sent as X-API-Key
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"  # memory (per process) or redis (shared)
+    REDIS_URL: str = "redis://localhost:6379/0"
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,44 @@
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from typing import Dict
+
+
+class BodySizeLimitMiddleware:
+    """
+    Reject request bodies above a per-path byte limit
+
+    Requests that declare a larger Content-Length are refused before any of
+    the body is read. Chunked uploads are counted as they stream in and
+    aborted as soon as they cross the limit.
+    """
+
+    def __init__(self, app, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        detail = f"Request body too large (max {limit} bytes)"
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length and content_length.isdigit() and int(content_length) > limit:
+            response = JSONResponse({"detail": detail}, status_code=413)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -0,0 +1,68 @@
+from fastapi.responses import JSONResponse
+from typing import Dict
+
+
+class RateLimitMiddleware:
+    """
+    Enforce per-user rate limits and daily quotas on metered endpoints
+
+    ``endpoints`` maps path prefixes to endpoint names, e.g.
+    {"/api/murshid/chat": "chat"}; other paths pass straight through.
+    Requests with an X-API-Key from PREMIUM_API_KEYS are limited per key on
+    the premium tier; everything else per client address on the free tier.
+    Client-supplied IDs such as X-User-Id are never trusted here. Responses carry X-RateLimit-* and X-Quota-* headers; refused requests
+    get a 429 with Retry-After before any of their body is read.
+    """
+
+    def __init__(self, app, limiter, endpoints: Dict[str, str]):
+        self.app = app
+        self.limiter = limiter
+        self.endpoints = list(endpoints.items())
+
+    def _endpoint(self, path: str):
+        for prefix, name in self.endpoints:
+            if path.startswith(prefix):
+                return name
+        return None
+
+    async def __call__(self, scope, receive, send):
+        endpoint = self._endpoint(scope["path"]) if scope["type"] == "http" else None
+        if endpoint is None or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        api_key = dict(scope["headers"]).get(b"x-api-key")
+        key_id = self.limiter.premium_key_id(api_key) if api_key else None
+        if key_id:
+            user, premium = f"key:{key_id}", True
+        else:
+            client = scope.get("client")
+            user, premium = f"ip:{client[0] if client else 'unknown'}", False
+
+        decision = await self.limiter.check(user, endpoint, premium)
+        headers = [
+            (b"x-ratelimit-limit", str(decision.limit).encode()),
+            (b"x-ratelimit-remaining", str(decision.remaining).encode()),
+            (b"x-ratelimit-reset", str(decision.reset).encode()),
+            (b"x-quota-limit", str(decision.quota_limit).encode()),
+            (b"x-quota-remaining", str(decision.quota_remaining).encode()),
+            (b"x-quota-reset", str(decision.quota_reset).encode())
+        ]
+
+        if not decision.allowed:
+            detail = (
+                "Daily quota exceeded" if decision.quota_remaining == 0
+                else "Rate limit exceeded"
+            )
+            response = JSONResponse({"detail": detail}, status_code=429)
+            response.raw_headers.extend(headers)
+            response.raw_headers.append((b"retry-after", str(max(1, decision.retry_after)).encode()))
+            await response(scope, receive, send)
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), *headers]}
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
@@ -1,4 +1,5 @@
 from pydantic import BaseModel, Field
+from app.config import settings
 from typing import Optional, List
 from enum import Enum
 
@@ -21,12 +22,26 @@ class VoiceStyleEnum(str, Enum):
     WISE = "wise"
     GENTLE = "gentle"
 
+class VoiceResponseModeEnum(str, Enum):
+    """How voice chat returns its reply"""
+    JSON = "json"      # Text plus base64 audio once everything is ready
+    STREAM = "stream"  # MP3 streamed sentence by sentence while the reply is generated
+    MULTIPART = "multipart"  # multipart/mixed: JSON metadata part, then the raw MP3
+    AUDIO_ID = "audio_id"  # Small JSON with a short-lived URL to fetch the MP3 from
+
 # Request Models
 class ChatRequest(BaseModel):
     message: str = Field(..., min_length=1, max_length=1000, description="User's message")
     language: LanguageEnum = Field(default=LanguageEnum.ENGLISH, description="Response language")
     user_id: Optional[str] = Field(None, description="User ID for context")
-    conversation_history: Optional[List[dict]] = Field(default=[], description="Previous messages")
+    session_id: Optional[str] = Field(
+        None, max_length=64, pattern=r"^[A-Za-z0-9_-]+$",
+        description="Server-side session to continue; omit to start a new one"
+    )
+    conversation_history: Optional[List[dict]] = Field(
+        default=[], max_length=settings.SESSION_MAX_TURNS,
+        description="Deprecated: previous messages, used only without session_id"
+    )
     
     class Config:
         json_schema_extra = {
@@ -86,12 +101,27 @@ class VoiceGenerateRequest(BaseModel):
             }
         }
 
+class QiblaBatchRequest(BaseModel):
+    latitudes: List[float] = Field(..., min_length=1, max_length=10000, description="Latitudes in degrees")
+    longitudes: List[float] = Field(..., min_length=1, max_length=10000, description="Longitudes, same order and length")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "latitudes": [23.8103, 51.5074],
+                "longitudes": [90.4125, -0.1278]
+            }
+        }
+
 # Response Models
 class ChatResponse(BaseModel):
     response: str = Field(..., description="AI Murshid's response")
     language: str
     timestamp: str
     tokens_used: Optional[int] = None
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    session_id: Optional[str] = None
     
 class VoiceResponse(BaseModel):
     text: str
@@ -1,7 +1,10 @@
-import httpx
 from app.config import settings
+from app.services.http_clients import upstream_clients
+from app.services.prayer_times import prayer_timetable, resolve_timezone
+from app.services.qibla import qibla_direction
+from app.services.gazetteer import gazetteer
 import logging
-from typing import Dict, Optional
+from typing import Dict, Optional, List
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -9,45 +12,85 @@ logger = logging.getLogger(__name__)
 class AladhanService:
     def __init__(self):
         self.base_url = settings.ALADHAN_API_URL
-        self.timeout = 10.0
+    
+    @property
+    def client(self):
+        """Shared pooled client for the aladhan upstream"""
+        return upstream_clients.get("aladhan")
     
     async def get_prayer_times(
         self,
         city: str = "Dhaka",
         country: str = "Bangladesh"
     ) -> Optional[Dict]:
-        """Get prayer times by city"""
+        """Get prayer times by city, resolved and calculated locally when the city is known"""
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.base_url}/timingsByCity",
-                    params={
-                        "city": city,
-                        "country": country,
-                        "method": 2  # ISNA method (you can change)
-                    }
-                )
-                response.raise_for_status()
-                data = response.json()
-                
-                timings = data.get("data", {}).get("timings", {})
-                date_info = data.get("data", {}).get("date", {})
+            status, cities = gazetteer.resolve(city, country)
+        except ValueError:
+            status, cities = "not_found", []
+        
+        if status != "not_found":
+            try:
+                # An ambiguous name takes its most populous match
+                place = cities[0]
+                timezone = resolve_timezone(place.timezone)
+                today = datetime.now(timezone).date()
+                result = prayer_timetable(
+                    place.latitude,
+                    place.longitude,
+                    today,
+                    1,
+                    timezone,
+                    method=settings.PRAYER_CALCULATION_METHOD
+                )[0]
                 
                 return {
-                    "date": date_info.get("readable"),
-                    "hijri_date": date_info.get("hijri", {}).get("date"),
-                    "timings": {
-                        "fajr": timings.get("Fajr"),
-                        "sunrise": timings.get("Sunrise"),
-                        "dhuhr": timings.get("Dhuhr"),
-                        "asr": timings.get("Asr"),
-                        "maghrib": timings.get("Maghrib"),
-                        "isha": timings.get("Isha")
-                    },
-                    "city": city,
-                    "country": country
+                    "date": today.strftime("%d %b %Y"),
+                    "hijri_date": None,
+                    "timings": result["timings"],
+                    "city": place.name,
+                    "country": gazetteer.countries.get(place.country, country)
                 }
                 
+            except Exception as e:
+                logger.error(f"Error calculating prayer times for {city}: {str(e)}")
+                return None
+        
+        return await self._fetch_prayer_times(city, country)
+    
+    async def _fetch_prayer_times(self, city: str, country: str) -> Optional[Dict]:
+        """Prayer times from Aladhan, for places not in the gazetteer"""
+        try:
+            client = self.client
+            response = await client.get(
+                f"{self.base_url}/timingsByCity",
+                params={
+                    "city": city,
+                    "country": country,
+                    "method": settings.PRAYER_CALCULATION_METHOD
+                }
+            )
+            response.raise_for_status()
+            data = response.json()
+            
+            timings = data.get("data", {}).get("timings", {})
+            date_info = data.get("data", {}).get("date", {})
+            
+            return {
+                "date": date_info.get("readable"),
+                "hijri_date": date_info.get("hijri", {}).get("date"),
+                "timings": {
+                    "fajr": timings.get("Fajr"),
+                    "sunrise": timings.get("Sunrise"),
+                    "dhuhr": timings.get("Dhuhr"),
+                    "asr": timings.get("Asr"),
+                    "maghrib": timings.get("Maghrib"),
+                    "isha": timings.get("Isha")
+                },
+                "city": city,
+                "country": country
+            }
+            
         except Exception as e:
             logger.error(f"Error fetching prayer times: {str(e)}")
             return None
@@ -55,37 +98,27 @@ class AladhanService:
     async def get_prayer_times_by_coordinates(
         self,
         latitude: float,
-        longitude: float
+        longitude: float,
+        tz: Optional[str] = None
     ) -> Optional[Dict]:
-        """Get prayer times by GPS coordinates"""
+        """Get prayer times by GPS coordinates, calculated locally in tz or the nearest city's timezone"""
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.base_url}/timings",
-                    params={
-                        "latitude": latitude,
-                        "longitude": longitude,
-                        "method": 2
-                    }
-                )
-                response.raise_for_status()
-                data = response.json()
-                
-                timings = data.get("data", {}).get("timings", {})
-                
-                return {
-                    "timings": {
-                        "fajr": timings.get("Fajr"),
-                        "sunrise": timings.get("Sunrise"),
-                        "dhuhr": timings.get("Dhuhr"),
-                        "asr": timings.get("Asr"),
-                        "maghrib": timings.get("Maghrib"),
-                        "isha": timings.get("Isha")
-                    }
-                }
-                
+            timezone = resolve_timezone(tz or gazetteer.nearest(latitude, longitude).timezone)
+            today = datetime.now(timezone).date()
+            
+            result = prayer_timetable(
+                latitude,
+                longitude,
+                today,
+                1,
+                timezone,
+                method=settings.PRAYER_CALCULATION_METHOD
+            )[0]
+            
+            return {"timings": result["timings"]}
+            
         except Exception as e:
-            logger.error(f"Error fetching prayer times by coordinates: {str(e)}")
+            logger.error(f"Error calculating prayer times by coordinates: {str(e)}")
             return None
     
     async def get_qibla_direction(
@@ -93,33 +126,25 @@ class AladhanService:
         latitude: float,
         longitude: float
     ) -> Optional[float]:
-        """Get Qibla direction in degrees"""
+        """Get Qibla direction in degrees, calculated locally"""
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.base_url}/qibla/{latitude}/{longitude}"
-                )
-                response.raise_for_status()
-                data = response.json()
-                
-                direction = data.get("data", {}).get("direction")
-                return direction
-                
+            return qibla_direction(latitude, longitude)
+            
         except Exception as e:
-            logger.error(f"Error fetching Qibla direction: {str(e)}")
+            logger.error(f"Error calculating Qibla direction: {str(e)}")
             return None
     
     async def get_99_names_of_allah(self) -> Optional[List[Dict]]:
         """Get 99 Names of Allah"""
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(f"{self.base_url}/asmaAlHusna")
-                response.raise_for_status()
-                data = response.json()
-                
-                names = data.get("data", [])
-                return names
-                
+            client = self.client
+            response = await client.get(f"{self.base_url}/asmaAlHusna")
+            response.raise_for_status()
+            data = response.json()
+            
+            names = data.get("data", [])
+            return names
+            
         except Exception as e:
             logger.error(f"Error fetching 99 names: {str(e)}")
             return None
\ No newline at end of file
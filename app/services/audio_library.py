@@ -0,0 +1,273 @@
+from app.config import settings
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+import asyncio
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+KINDS = ["zikr", "names", "fatiha", "naseehah"]
+
+# How often the manifest's mtime is checked for a render run in another process
+MANIFEST_CHECK_SECONDS = 10
+
+def zikr_phrase(suggestion: str) -> str:
+    """Spoken part of a zikr suggestion, without the '(100 times)' note"""
+    return re.sub(r"\s*\(.*?\)", "", suggestion).strip()
+
+def slugify(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+
+class AudioLibrary:
+    """
+    Pre-rendered audio for fixed content (zikr, 99 names, Al-Fatiha, naseehah)
+
+    Files live at ``<dir>/<kind>/<slug>.<voice_style>.<language>.mp3`` and are
+    listed in ``manifest.json`` together with the TTS cache key that
+    ElevenLabsService computes for them. Any synthesis of the same text with
+    the same settings is served from the library, which is never evicted.
+    The manifest is reloaded when its file changes, so a render run picks
+    up in a live server.
+    """
+
+    def __init__(self, library_dir: str):
+        self.library_dir = Path(library_dir)
+        self.manifest_path = self.library_dir / "manifest.json"
+        self._manifest: Optional[Dict[str, Dict]] = None
+        self._by_key: Dict[str, str] = {}
+        self._mtime: Optional[int] = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def item_id(kind: str, slug: str, voice_style: str, language: str) -> str:
+        return f"{kind}/{slug}/{voice_style}/{language}"
+
+    def _manifest_mtime(self) -> Optional[int]:
+        try:
+            return self.manifest_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    @property
+    def manifest(self) -> Dict[str, Dict]:
+        now = time.monotonic()
+        if self._manifest is not None and now - self._checked >= MANIFEST_CHECK_SECONDS:
+            self._checked = now
+            if self._manifest_mtime() != self._mtime:
+                logger.info("Audio library manifest changed, reloading")
+                self._manifest = None
+
+        if self._manifest is None:
+            self._checked = now
+            self._mtime = self._manifest_mtime()
+            try:
+                self._manifest = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+            except FileNotFoundError:
+                self._manifest = {}
+            except Exception as e:
+                logger.error(f"Unreadable audio library manifest: {str(e)}")
+                self._manifest = {}
+            self._by_key = {entry["key"]: item for item, entry in self._manifest.items()}
+        return self._manifest
+
+    def _file(self, item: Optional[str]) -> Optional[Path]:
+        entry = self.manifest.get(item) if item else None
+        if entry is None:
+            return None
+        path = self.library_dir / entry["file"]
+        return path if path.exists() else None
+
+    def lookup(self, key: str) -> Optional[Path]:
+        """File for a TTS cache key, None if not pre-rendered"""
+        # Reading the manifest also builds the key index
+        item = self._by_key.get(key) if self.manifest else None
+        return self._file(item)
+
+    def lookup_item(self, kind: str, slug: str, voice_style: str, language: str) -> Optional[Path]:
+        return self._file(self.item_id(kind, slug, voice_style, language))
+
+    def entries(
+        self,
+        kind: Optional[str] = None,
+        voice_style: Optional[str] = None,
+        language: Optional[str] = None
+    ) -> List[Dict]:
+        return [
+            e for e in self.manifest.values()
+            if (kind is None or e["kind"] == kind)
+            and (voice_style is None or e["voice_style"] == voice_style)
+            and (language is None or e["language"] == language)
+        ]
+
+    def add(self, entry: Dict, audio: bytes):
+        """Write a rendered file and record it in the manifest"""
+        path = self.library_dir / entry["file"]
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(audio)
+        os.replace(tmp, path)
+
+        item = self.item_id(entry["kind"], entry["slug"], entry["voice_style"], entry["language"])
+        with self._lock:
+            self.manifest[item] = {**entry, "bytes": len(audio)}
+            self._by_key[entry["key"]] = item
+
+            tmp = self.manifest_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self.manifest, ensure_ascii=False, indent=1), encoding="utf-8")
+            os.replace(tmp, self.manifest_path)
+            # Our own write; no need to reload it
+            self._mtime = self._manifest_mtime()
+
+audio_library = AudioLibrary(settings.AUDIO_LIBRARY_DIR)
+
+async def library_texts(kinds: Iterable[str], language: str) -> List[Tuple[str, str, str, float]]:
+    """(kind, slug, text, speed) of everything to render in a language"""
+    from app.services.aladhan_service import AladhanService
+    from app.services.naseehah_scheduler import naseehah_scheduler
+    from app.services.quran_service import QuranService
+    from app.services.elevenlabs_service import ElevenLabsService
+    from app.utils.zikr import ZIKR_REFERENCES, ZIKR_SUGGESTIONS
+
+    speeds = ElevenLabsService().get_recommended_speed
+    texts = []
+
+    if "zikr" in kinds:
+        phrases = {zikr_phrase(s) for suggestions in ZIKR_SUGGESTIONS.values() for s in suggestions}
+        # "Ayatul Kursi" read aloud is just its name; the texts themselves
+        # are other kinds (Al-Fatiha) or not in the library
+        for phrase in sorted(phrases - ZIKR_REFERENCES.keys()):
+            texts.append(("zikr", slugify(phrase), phrase, speeds("dua")))
+
+    if "names" in kinds:
+        names = await AladhanService().get_99_names_of_allah()
+        if names is None:
+            logger.warning("Skipping the 99 names: could not fetch them")
+        for name in names or []:
+            texts.append(("names", str(name["number"]), name["name"], speeds("quran")))
+
+    if "fatiha" in kinds:
+        quran_service = QuranService()
+        translation_id = quran_service.get_translation_id(language)
+        surah = await quran_service.get_full_surah(1, translation_id or 131)
+        if surah is None:
+            logger.warning("Skipping Al-Fatiha: could not fetch it")
+        else:
+            arabic = " ".join(v["arabic_text"] for v in surah["verses"])
+            texts.append(("fatiha", "arabic", arabic, speeds("quran")))
+            if translation_id:
+                translation = " ".join(
+                    re.sub(r"<sup.*?</sup>|<[^>]+>", "", v["translation"]) for v in surah["verses"]
+                )
+                texts.append(("fatiha", "translation", translation, speeds("advice")))
+
+    if "naseehah" in kinds:
+        today = datetime.now(timezone.utc).date()
+        entry = await naseehah_scheduler.ensure(today, language)
+        if entry.get("success", True):
+            texts.append(("naseehah", today.isoformat(), entry["naseehah"], speeds("advice")))
+
+    return texts
+
+async def render_library(
+    kinds: Iterable[str],
+    voice_styles: Iterable[str],
+    languages: Iterable[str],
+    concurrency: int = 4
+):
+    """
+    Render every library text per voice style and language
+
+    Items already in the manifest with their file on disk are skipped, so
+    an interrupted run picks up where it stopped. Audio identical to an
+    item rendered before is copied from it rather than synthesized again.
+    """
+    from app.services.elevenlabs_service import ElevenLabsService
+    from app.services.http_clients import upstream_clients
+    from app.services.openai_service import close_openai_client
+    from app.utils.single_flight import single_flight
+
+    service = ElevenLabsService()
+    semaphore = asyncio.Semaphore(concurrency)
+    counts = {"rendered": 0, "skipped": 0, "failed": 0}
+
+    async def render(kind: str, slug: str, text: str, speed: float, voice_style: str, language: str):
+        if audio_library.lookup_item(kind, slug, voice_style, language):
+            counts["skipped"] += 1
+            return
+
+        key = service._cache_key(text, voice_style, language, speed)
+
+        async def synthesize() -> bytes:
+            async with semaphore:
+                return b"".join([
+                    chunk async for chunk in service.stream_speech(text, voice_style, language, speed)
+                ])
+
+        try:
+            # Voice styles sharing a voice render identical audio once
+            audio = await single_flight.do(("library-render", key), synthesize)
+        except Exception as e:
+            counts["failed"] += 1
+            logger.error(f"Failed to render {kind}/{slug} ({voice_style}, {language}): {str(e)}")
+            return
+
+        entry = {
+            "key": key,
+            "kind": kind,
+            "slug": slug,
+            "voice_style": voice_style,
+            "language": language,
+            "speed": speed,
+            "text": text,
+            "file": f"{kind}/{slug}.{voice_style}.{language}.mp3",
+            "rendered_at": datetime.now(timezone.utc).isoformat()
+        }
+        await asyncio.to_thread(audio_library.add, entry, audio)
+        counts["rendered"] += 1
+        logger.info(f"Rendered {entry['file']}")
+
+    try:
+        for language in languages:
+            texts = await library_texts(kinds, language)
+            await asyncio.gather(*(
+                render(kind, slug, text, speed, voice_style, language)
+                for kind, slug, text, speed in texts
+                for voice_style in voice_styles
+            ))
+    finally:
+        await upstream_clients.shutdown()
+        await close_openai_client()
+
+    logger.info(
+        f"Audio library: {counts['rendered']} rendered, {counts['skipped']} already done, "
+        f"{counts['failed']} failed"
+    )
+
+def main():
+    import argparse
+    from app.models.schemas import LanguageEnum, VoiceStyleEnum
+
+    languages = [language.value for language in LanguageEnum]
+    voice_styles = [style.value for style in VoiceStyleEnum]
+
+    parser = argparse.ArgumentParser(description="Pre-render the static audio library")
+    parser.add_argument("command", choices=["render"])
+    parser.add_argument("--kinds", nargs="*", choices=KINDS, default=KINDS)
+    parser.add_argument("--voice-styles", nargs="*", choices=voice_styles, default=voice_styles)
+    parser.add_argument("--languages", nargs="*", choices=languages, default=languages)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    asyncio.run(render_library(args.kinds, args.voice_styles, args.languages, args.concurrency))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+from app.config import settings
+from pathlib import Path
+from typing import AsyncIterator, Optional, Set
+import asyncio
+import logging
+import os
+import re
+import secrets
+import time
+
+logger = logging.getLogger(__name__)
+
+_AUDIO_ID = re.compile(r"^[A-Za-z0-9_-]{16,64}$")
+
+class AudioStore:
+    """
+    Short-lived generated audio, fetched by ID
+
+    Audio is streamed to ``<id>.mp3`` under the store directory, so every
+    worker process can serve it, and expires after the TTL. Expired files
+    are swept at most once a minute when new audio is saved.
+    """
+
+    def __init__(self, audio_dir: str, ttl_seconds: int):
+        self.audio_dir = Path(audio_dir)
+        self.ttl_seconds = ttl_seconds
+        self._last_sweep = 0.0
+        # The loop only holds weak references to tasks
+        self._tasks: Set[asyncio.Task] = set()
+
+    def _path(self, audio_id: str) -> Path:
+        return self.audio_dir / f"{audio_id}.mp3"
+
+    async def save(self, chunks: AsyncIterator[bytes]) -> str:
+        """Write streamed audio to the store and return its ID"""
+        audio_id = secrets.token_urlsafe(24)
+        path = self._path(audio_id)
+        tmp = path.with_suffix(".tmp")
+
+        await asyncio.to_thread(self.audio_dir.mkdir, parents=True, exist_ok=True)
+        handle = await asyncio.to_thread(open, tmp, "wb")
+        try:
+            async for chunk in chunks:
+                await asyncio.to_thread(handle.write, chunk)
+        except BaseException:
+            handle.close()
+            tmp.unlink(missing_ok=True)
+            raise
+        handle.close()
+        os.replace(tmp, path)
+
+        if time.time() - self._last_sweep > 60:
+            self._last_sweep = time.time()
+            task = asyncio.create_task(asyncio.to_thread(self.sweep))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        return audio_id
+
+    def path(self, audio_id: str) -> Optional[Path]:
+        """File of unexpired audio, None if unknown or expired"""
+        if not _AUDIO_ID.match(audio_id):
+            return None
+        path = self._path(audio_id)
+        try:
+            if time.time() - path.stat().st_mtime > self.ttl_seconds:
+                return None
+        except FileNotFoundError:
+            return None
+        return path
+
+    def sweep(self) -> int:
+        """Delete expired audio and abandoned partial files"""
+        removed = 0
+        cutoff = time.time() - self.ttl_seconds
+        try:
+            for path in self.audio_dir.iterdir():
+                try:
+                    if path.stat().st_mtime < cutoff:
+                        path.unlink()
+                        removed += 1
+                except FileNotFoundError:
+                    pass
+        except Exception as e:
+            logger.warning(f"Audio store sweep failed: {str(e)}")
+        return removed
+
+audio_store = AudioStore(settings.VOICE_AUDIO_DIR, settings.VOICE_AUDIO_TTL_SECONDS)
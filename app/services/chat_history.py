@@ -0,0 +1,160 @@
+from app.config import settings
+from app.utils.tokens import MESSAGE_OVERHEAD, count_tokens
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import hashlib
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+class HistoryManager:
+    """
+    Fits conversation history into a prompt token budget
+
+    The newest turns are kept verbatim while they fit the budget. Older
+    turns are folded into a running summary in fixed blocks of
+    `block_turns`: the summary of the first n blocks is the summary of the
+    first n-1 plus block n. Each summary is remembered by the turns it
+    covers, so a growing conversation extends the previous one.
+
+    A request makes at most one summary call. When the previous summary
+    is not known (a new process, or a long history uploaded at once), the
+    newest `summary_input_tokens` of the older turns are summarized from
+    scratch instead and anything before them is dropped.
+
+    Only the newest `max_turns` are considered, dropped half a window at a
+    time from fixed positions (as SessionStore does) so summaries stay
+    reusable between requests.
+    """
+
+    def __init__(
+        self,
+        summarize: Callable[[str, List[Dict], str], Awaitable[str]],
+        model: str,
+        budget: int = settings.HISTORY_TOKEN_BUDGET,
+        block_turns: int = settings.HISTORY_SUMMARY_BLOCK_TURNS,
+        summary_tokens: int = settings.HISTORY_SUMMARY_MAX_TOKENS,
+        summary_input_tokens: int = settings.HISTORY_SUMMARY_INPUT_TOKENS,
+        max_turns: int = settings.SESSION_MAX_TURNS,
+        memory_entries: int = 4096
+    ):
+        self.summarize = summarize
+        self.model = model
+        self.budget = budget
+        self.block_turns = block_turns
+        self.summary_tokens = summary_tokens
+        self.summary_input_tokens = summary_input_tokens
+        self.max_turns = max_turns
+        self.memory_entries = memory_entries
+        self.trim_step = max(block_turns, (max_turns // 2) // block_turns * block_turns)
+
+        # Hash of the summarized turns -> summary
+        self._summaries: "OrderedDict[str, str]" = OrderedDict()
+
+    def _tokens(self, message: Dict) -> int:
+        return MESSAGE_OVERHEAD + count_tokens(message["content"], self.model)
+
+    def _window_start(self, turns: List[Dict], budget: int) -> int:
+        """Index of the oldest turn that still fits, walking back from the newest"""
+        used = 0
+        start = len(turns)
+        while start > 0:
+            tokens = self._tokens(turns[start - 1])
+            if used + tokens > budget:
+                break
+            used += tokens
+            start -= 1
+        return start
+
+    @staticmethod
+    def _summary_key(turns: List[Dict], language: str) -> str:
+        payload = json.dumps([str(language), turns], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, summary: str):
+        self._summaries[key] = summary
+        self._summaries.move_to_end(key)
+        while len(self._summaries) > self.memory_entries:
+            self._summaries.popitem(last=False)
+
+    async def _summary(self, turns: List[Dict], language: str) -> str:
+        """Summary of all of `turns`, in one summarize call at most"""
+        key = self._summary_key(turns, language)
+        summary = self._summaries.get(key)
+        if summary is not None:
+            self._summaries.move_to_end(key)
+            return summary
+
+        # Extend the summary of the turns before the last block
+        start = (len(turns) - 1) // self.block_turns * self.block_turns
+        previous = "" if start == 0 else self._summaries.get(self._summary_key(turns[:start], language))
+        if previous is None:
+            # Unknown: summarize only the newest turns that fit the input cap
+            start = self._window_start(turns, self.summary_input_tokens)
+            if start == len(turns):
+                turns = turns[:-1] + [self._truncate(turns[-1], self.summary_input_tokens)]
+                start -= 1
+            previous = ""
+
+        summary = await self.summarize(previous, turns[start:], language)
+        if summary:
+            self._remember(key, summary)
+        return summary
+
+    def _truncate(self, message: Dict, budget: int) -> Dict:
+        """Keep the end of a message too long for the budget on its own"""
+        content = message["content"]
+        while content and MESSAGE_OVERHEAD + count_tokens(content, self.model) > budget:
+            content = content[len(content) // 4:]
+        return {**message, "content": f"...{content}" if content else ""}
+
+    async def fit(
+        self,
+        history: Optional[List[Dict]],
+        language: str
+    ) -> Tuple[Optional[str], List[Dict]]:
+        """(summary of older turns or None, recent turns to send verbatim)"""
+        turns = [
+            {"role": turn["role"], "content": turn["content"]}
+            for turn in history or []
+            if isinstance(turn, dict)
+            and turn.get("role") in ("user", "assistant")
+            and isinstance(turn.get("content"), str)
+            and turn["content"].strip()
+        ]
+        if not turns:
+            return None, []
+
+        excess = len(turns) - self.max_turns
+        if excess > 0:
+            drop = -(-excess // self.trim_step) * self.trim_step
+            turns = turns[drop:]
+
+        start = self._window_start(turns, self.budget)
+        if start == 0:
+            return None, turns
+
+        # Older turns exist: make room for their summary
+        budget = max(self.budget - self.summary_tokens, self.budget // 2)
+        start = self._window_start(turns, budget)
+
+        if start == len(turns):
+            # The newest turn alone is over budget: keep its end
+            recent = [self._truncate(turns[-1], budget)]
+            cut = len(turns) - 1
+        else:
+            # Round the cut up to a block boundary so one summary serves
+            # block_turns consecutive requests
+            cut = -(-start // self.block_turns) * self.block_turns
+            if cut >= len(turns):
+                cut = start
+            recent = turns[cut:]
+
+        try:
+            summary = await self._summary(turns[:cut], language)
+        except Exception as e:
+            logger.error(f"History summary error: {str(e)}")
+            summary = ""
+
+        return summary or None, recent
@@ -1,16 +1,24 @@
-from elevenlabs import generate, set_api_key, Voice, VoiceSettings
 from app.config import settings
+from app.services.http_clients import upstream_clients
+from app.services.tts_cache import tts_cache
+from app.services.audio_library import audio_library
+from app.utils.concurrency import ConcurrencyLimiter
+import asyncio
 import logging
 import base64
-from typing import Dict, List
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
-# Set ElevenLabs API key
-set_api_key(settings.ELEVENLABS_API_KEY)
+# Caps concurrent syntheses across every ElevenLabsService instance
+tts_limiter = ConcurrencyLimiter(settings.ELEVENLABS_MAX_CONCURRENCY)
 
 class ElevenLabsService:
     def __init__(self):
+        self.base_url = settings.ELEVENLABS_API_URL
+        self.model = settings.ELEVENLABS_MODEL  # Supports multiple languages
+        
         # Default voice IDs (you can customize these from ElevenLabs dashboard)
         self.voice_ids = {
             "calm": "21m00Tcm4TlvDq8ikWAM",   # Rachel - calm, clear
@@ -18,6 +26,149 @@ class ElevenLabsService:
             "gentle": "21m00Tcm4TlvDq8ikWAM"  # Can change to different voice
         }
     
+    @property
+    def client(self):
+        """Shared pooled client for the ElevenLabs API"""
+        return upstream_clients.get("elevenlabs")
+    
+    def _voice_settings(
+        self,
+        voice_style: str,
+        language: str,
+        speed: float
+    ) -> Tuple[str, Dict]:
+        """Pick the voice ID and tune its settings for speed and language"""
+        # Get appropriate voice ID
+        voice_id = self.voice_ids.get(voice_style, self.voice_ids["calm"])
+        
+        # Adjust stability based on speed
+        # Slower speech needs higher stability
+        stability = 0.75 if speed < 1.0 else 0.60
+        
+        # Adjust style based on language
+        # Arabic/Urdu: More formal, less expressive
+        # English: More natural variation
+        style_exaggeration = 0.3 if language in ['ar', 'ur'] else 0.5
+        
+        return voice_id, {
+            "stability": stability,           # Voice consistency (0-1)
+            "similarity_boost": 0.75,         # Voice similarity (0-1)
+            "style": style_exaggeration,      # Expressiveness (0-1)
+            "use_speaker_boost": True,        # Enhanced clarity
+            "speed": speed                    # Speech rate (0.5-1.5)
+        }
+    
+    def _cache_key(self, text: str, voice_style: str, language: str, speed: float) -> str:
+        voice_id, voice_settings = self._voice_settings(voice_style, language, speed)
+        return tts_cache.key(
+            text, voice_id, voice_settings, self.model, language, settings.ELEVENLABS_OUTPUT_FORMAT
+        )
+    
+    def cached_speech(
+        self,
+        text: str,
+        voice_style: str = "calm",
+        language: str = "en",
+        speed: float = 0.85
+    ) -> Optional[Path]:
+        """Path of pre-rendered or cached audio for these settings, None if neither"""
+        key = self._cache_key(text, voice_style, language, speed)
+        return audio_library.lookup(key) or tts_cache.lookup(key)
+    
+    async def stream_speech(
+        self,
+        text: str,
+        voice_style: str = "calm",
+        language: str = "en",
+        speed: float = 0.85
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream MP3 audio chunks as ElevenLabs synthesizes them
+        
+        Chunks are yielded as soon as they arrive, so callers can start
+        forwarding audio before synthesis has finished. Pre-rendered library
+        audio or audio synthesized before is read from disk instead, and new
+        audio is added to the TTS cache. Raises on provider errors instead of
+        returning an error dict.
+        """
+        key = self._cache_key(text, voice_style, language, speed)
+        
+        cached = audio_library.lookup(key) or tts_cache.lookup(key)
+        if cached is not None:
+            async for chunk in tts_cache.read(cached, settings.TTS_STREAM_CHUNK_SIZE):
+                yield chunk
+            return
+        
+        tts_cache.record_miss()
+        audio = tts_cache.store(key, self._synthesize(text, voice_style, language, speed))
+        try:
+            async for chunk in audio:
+                yield chunk
+        finally:
+            await audio.aclose()
+    
+    async def _synthesize(
+        self,
+        text: str,
+        voice_style: str,
+        language: str,
+        speed: float
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream audio from the ElevenLabs API
+        
+        The upstream response is read by a task into a queue, and the
+        tts_limiter slot is released as soon as ElevenLabs finishes, not
+        when a slow client has downloaded everything. The buffer holds at
+        most one synthesis.
+        """
+        voice_id, voice_settings = self._voice_settings(voice_style, language, speed)
+        
+        logger.info(
+            f"Generating voice: speed={speed}, stability={voice_settings['stability']}, "
+            f"style={voice_settings['style']}"
+        )
+        
+        queue: asyncio.Queue = asyncio.Queue()
+        
+        async def produce():
+            try:
+                async with tts_limiter.acquire("tts"):
+                    async with self.client.stream(
+                        "POST",
+                        f"{self.base_url}/text-to-speech/{voice_id}/stream",
+                        params={"output_format": settings.ELEVENLABS_OUTPUT_FORMAT},
+                        headers={"xi-api-key": settings.ELEVENLABS_API_KEY},
+                        json={
+                            "text": text,
+                            "model_id": self.model,
+                            "voice_settings": voice_settings
+                        },
+                        timeout=settings.ELEVENLABS_TIMEOUT
+                    ) as response:
+                        if response.is_error:
+                            await response.aread()
+                        response.raise_for_status()
+                        
+                        async for chunk in response.aiter_bytes(settings.TTS_STREAM_CHUNK_SIZE):
+                            queue.put_nowait(chunk)
+                queue.put_nowait(None)
+            except Exception as e:
+                queue.put_nowait(e)
+        
+        producer = asyncio.create_task(produce())
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # Stops the upstream request if the consumer gives up early
+            producer.cancel()
+    
     async def text_to_speech(
         self,
         text: str,
@@ -43,35 +194,10 @@ class ElevenLabsService:
             Dict with audio data and success status
         """
         try:
-            # Get appropriate voice ID
-            voice_id = self.voice_ids.get(voice_style, self.voice_ids["calm"])
-            
-            # Adjust stability based on speed
-            # Slower speech needs higher stability
-            stability = 0.75 if speed < 1.0 else 0.60
-            
-            # Adjust style based on language
-            # Arabic/Urdu: More formal, less expressive
-            # English: More natural variation
-            style_exaggeration = 0.3 if language in ['ar', 'ur'] else 0.5
-            
-            logger.info(f"Generating voice: speed={speed}, stability={stability}, style={style_exaggeration}")
-            
-            # Generate audio with custom settings
-            audio = generate(
-                text=text,
-                voice=Voice(
-                    voice_id=voice_id,
-                    settings=VoiceSettings(
-                        stability=stability,           # Voice consistency (0-1)
-                        similarity_boost=0.75,         # Voice similarity (0-1)
-                        style=style_exaggeration,      # Expressiveness (0-1)
-                        use_speaker_boost=True,        # Enhanced clarity
-                        speed=speed                    # Speech rate (0.5-1.5)
-                    )
-                ),
-                model="eleven_multilingual_v2"  # Supports multiple languages
-            )
+            chunks = [
+                chunk async for chunk in self.stream_speech(text, voice_style, language, speed)
+            ]
+            audio = b"".join(chunks)
             
             # Convert to base64 for easy transmission
             audio_base64 = base64.b64encode(audio).decode('utf-8')
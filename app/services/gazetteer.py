@@ -0,0 +1,315 @@
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import gzip
+import heapq
+import logging
+import numpy as np
+import re
+import threading
+import unicodedata
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+
+# Common names that are neither the GeoNames name nor an ISO code
+COUNTRY_ALIASES = {
+    "usa": "US", "america": "US", "uk": "GB", "britain": "GB", "england": "GB",
+    "scotland": "GB", "wales": "GB", "uae": "AE", "emirates": "AE", "ksa": "SA",
+    "saudi": "SA", "russia": "RU", "south korea": "KR", "north korea": "KP",
+    "iran": "IR", "syria": "SY", "palestine": "PS", "turkiye": "TR", "burma": "MM",
+    "ivory coast": "CI", "czechia": "CZ", "holland": "NL", "vietnam": "VN"
+}
+
+class City(NamedTuple):
+    name: str
+    country: str          # ISO 3166-1 alpha-2
+    latitude: float
+    longitude: float
+    timezone: str         # IANA name
+    population: int
+
+def normalize(text: str) -> str:
+    """Lowercase ASCII key: accents removed, punctuation folded to single spaces"""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c)).casefold()
+    return re.sub(r"[\W_]+", " ", text).strip()
+
+_SHORT_PREFIX = re.compile(r"^[a-z0-9]{1,2}$")
+
+# Population ratio at which an alias match beats primary-name matches,
+# and at which the most populous candidate is taken as the answer
+DOMINANCE = 10
+
+class Gazetteer:
+    """
+    Bundled cities (GeoNames, population 15,000+) with coordinates and time zones
+
+    Names are indexed as a sorted array of normalized keys, a flattened
+    trie: every prefix is one contiguous range found by binary search, so
+    exact lookups and autocomplete take microseconds and the index costs
+    a few lists. Each city is indexed under its name and its alternate
+    names (ASCII spelling, exonyms such as Mecca or Chittagong). Loaded on
+    first use; the server loads it at startup.
+    """
+
+    def __init__(self, cities_path: Path, countries_path: Path):
+        self.cities_path = cities_path
+        self.countries_path = countries_path
+
+        self.cities: List[City] = []
+        self.countries: Dict[str, str] = {}
+        self._country_keys: Dict[str, str] = {}
+        self._keys: List[str] = []
+        self._ids: List[int] = []
+        self._alias: List[bool] = []
+        self._latitudes = np.empty(0)      # Radians, for nearest()
+        self._longitudes = np.empty(0)
+        self._top: Dict[Tuple[str, int], List[int]] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def load(self):
+        with self._lock:
+            if self._loaded:
+                return
+
+            for line in self.countries_path.read_text(encoding="utf-8").splitlines():
+                iso, iso3, name = line.split("\t")
+                self.countries[iso] = name
+                for key in (iso, iso3, name):
+                    self._country_keys[normalize(key)] = iso
+            for alias, iso in COUNTRY_ALIASES.items():
+                self._country_keys.setdefault(alias, iso)
+
+            index = []
+            with gzip.open(self.cities_path, "rt", encoding="utf-8") as handle:
+                for i, line in enumerate(handle):
+                    name, country, lat, lng, tz, population, aliases = line.rstrip("\n").split("\t")
+                    city = City(name, country, float(lat), float(lng), tz, int(population))
+                    self.cities.append(city)
+                    index.append((normalize(name), -city.population, i, False))
+                    # Aliases are stored normalized
+                    for alias in aliases.split("|") if aliases else ():
+                        index.append((alias, -city.population, i, True))
+
+            # Same key: most populous first
+            index.sort()
+            self._keys = [key for key, _, _, _ in index]
+            self._ids = [i for _, _, i, _ in index]
+            self._alias = [alias for _, _, _, alias in index]
+            self._latitudes = np.radians([c.latitude for c in self.cities])
+            self._longitudes = np.radians([c.longitude for c in self.cities])
+            self._loaded = True
+            logger.info(f"Gazetteer loaded: {len(self.cities)} cities")
+
+    def country_code(self, country: str) -> Optional[str]:
+        """ISO code for a country name, ISO2/ISO3 code or common alias"""
+        self.load()
+        return self._country_keys.get(normalize(country))
+
+    def _country_filter(self, country: Optional[str]) -> Optional[str]:
+        if not country:
+            return None
+        code = self.country_code(country)
+        if code is None:
+            raise ValueError(f"Unknown country: {country}")
+        return code
+
+    def _by_population(self, ids: List[int], limit: int) -> List[int]:
+        # A city can match through several of its names
+        return heapq.nlargest(limit, set(ids), key=lambda i: self.cities[i].population)
+
+    def autocomplete(self, prefix: str, country: Optional[str] = None, limit: int = 10) -> List[City]:
+        """Cities with a name or alternate name starting with the prefix, most populous first"""
+        self.load()
+        key = normalize(prefix)
+        if not key:
+            return []
+        code = self._country_filter(country)
+
+        lo = bisect_left(self._keys, key)
+        hi = bisect_left(self._keys, key + "\uffff", lo)
+
+        if code is None and _SHORT_PREFIX.match(key):
+            # Short prefixes span thousands of cities; rank them once. Only
+            # 1-2 ASCII characters are cached, and limit is capped by the API
+            cached = self._top.get((key, limit))
+            if cached is None:
+                cached = self._top[(key, limit)] = self._by_population(self._ids[lo:hi], limit)
+            ids = cached
+        else:
+            ids = self._ids[lo:hi]
+            if code is not None:
+                ids = [i for i in ids if self.cities[i].country == code]
+            ids = self._by_population(ids, limit)
+        return [self.cities[i] for i in ids]
+
+    def resolve(self, city: str, country: Optional[str] = None, limit: int = 10) -> Tuple[str, List[City]]:
+        """
+        ("resolved", [city]), ("ambiguous", candidates) or ("not_found", suggestions)
+
+        Cities whose own name matches come first; a city matching by an
+        alternate name only counts if it is DOMINANCE times more populous
+        ("Medina" is Madinah, not a town of 26,000). The most
+        populous candidate is taken when it is DOMINANCE times the next
+        ("Dhaka" is the capital of Bangladesh). A name that is the start of
+        exactly one city's name resolves to it. Suggestions for an unknown
+        name are cities sharing its longest known prefix, which catches
+        most typos. Raises ValueError for an unknown country.
+        """
+        self.load()
+        key = normalize(city)
+        code = self._country_filter(country)
+
+        lo = bisect_left(self._keys, key)
+        hi = bisect_right(self._keys, key, lo)
+        primary: List[int] = []
+        aliased: List[int] = []
+        for pos in range(lo, hi):
+            i = self._ids[pos]
+            if code is None or self.cities[i].country == code:
+                (aliased if self._alias[pos] else primary).append(i)
+        aliased = [i for i in dict.fromkeys(aliased) if i not in primary]
+
+        population = lambda i: self.cities[i].population
+        if primary:
+            aliased = [i for i in aliased if population(i) >= DOMINANCE * population(primary[0])]
+        ids = sorted(primary + aliased, key=population, reverse=True)
+
+        if len(ids) == 1 or (ids and population(ids[0]) >= DOMINANCE * population(ids[1])):
+            return "resolved", [self.cities[ids[0]]]
+        if ids:
+            return "ambiguous", [self.cities[i] for i in ids[:limit]]
+
+        # A unique completion, e.g. "New York" for "New York City"
+        completions = self.autocomplete(key, country, 2)
+        if len(completions) == 1:
+            return "resolved", completions
+
+        for length in range(len(key), 2, -1):
+            suggestions = self.autocomplete(key[:length], country, limit)
+            if suggestions:
+                return "not_found", suggestions
+        return "not_found", []
+
+    def nearest(self, latitude: float, longitude: float) -> City:
+        """Closest city by great-circle distance, e.g. for the timezone of a coordinate"""
+        self.load()
+        lat, lng = np.radians(latitude), np.radians(longitude)
+        # Haversine without the arcsin, which keeps the order
+        h = (
+            np.sin((self._latitudes - lat) / 2) ** 2
+            + np.cos(lat) * np.cos(self._latitudes) * np.sin((self._longitudes - lng) / 2) ** 2
+        )
+        return self.cities[int(np.argmin(h))]
+
+    def describe(self, city: City) -> Dict:
+        return {
+            **city._asdict(),
+            "country_name": self.countries.get(city.country, city.country)
+        }
+
+gazetteer = Gazetteer(DATA_DIR / "cities.tsv.gz", DATA_DIR / "countries.tsv")
+
+_LATIN_KEY = re.compile(r"^[a-z0-9 ]+$")
+
+def _useful_alias(name: str) -> bool:
+    """Latin-script proper names; drops airport codes and lowercase transliterations"""
+    return (
+        len(name) >= 3
+        and name[0].isupper()
+        and not name.isupper()
+        and _LATIN_KEY.match(normalize(name)) is not None
+    )
+
+def _english_names(alternate_names_txt: str, geonameids: set, languages: set) -> Dict[str, set]:
+    """Names by geonameid from alternateNamesV2.txt in the given languages, not historic or colloquial"""
+    names: Dict[str, set] = {}
+    with open(alternate_names_txt, encoding="utf-8") as handle:
+        for line in handle:
+            fields = line.rstrip("\n").split("\t")
+            if (
+                fields[1] in geonameids
+                and fields[2] in languages
+                and fields[6:7] != ["1"]
+                and fields[7:8] != ["1"]
+            ):
+                names.setdefault(fields[1], set()).add(fields[3])
+    return names
+
+def build(
+    cities_txt: str,
+    country_info_txt: str,
+    out_dir: Path = DATA_DIR,
+    alternate_names_txt: Optional[str] = None,
+    languages: Tuple[str, ...] = ("en",)
+):
+    """
+    Write the bundled files from GeoNames dumps
+
+    cities_txt is cities15000.txt (or any citiesN.txt) and country_info_txt
+    is countryInfo.txt, both from https://download.geonames.org/export/dump/
+
+    Aliases are the ASCII name plus the Latin-script alternate names of
+    the cities file. With alternate_names_txt (alternateNamesV2.txt), the
+    alternate names are instead those tagged with one of `languages`,
+    which is cleaner than the untagged list.
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    countries = []
+    with open(country_info_txt, encoding="utf-8") as handle:
+        for line in handle:
+            if line.startswith("#") or not line.strip():
+                continue
+            fields = line.rstrip("\n").split("\t")
+            countries.append(f"{fields[0]}\t{fields[1]}\t{fields[4]}\n")
+    (out_dir / "countries.tsv").write_text("".join(countries), encoding="utf-8")
+
+    rows = []
+    with open(cities_txt, encoding="utf-8") as handle:
+        for line in handle:
+            fields = line.rstrip("\n").split("\t")
+            if fields[17]:
+                rows.append(fields)
+
+    tagged = None
+    if alternate_names_txt:
+        tagged = _english_names(alternate_names_txt, {f[0] for f in rows}, set(languages))
+
+    cities = []
+    for fields in rows:
+        alternates = tagged.get(fields[0], set()) if tagged is not None else fields[3].split(",")
+        aliases = {normalize(fields[2])} | {normalize(a) for a in alternates if _useful_alias(a)}
+        aliases -= {normalize(fields[1]), ""}
+        cities.append((
+            fields[8], -int(fields[14] or 0), fields[1],
+            float(fields[4]), float(fields[5]), fields[17], "|".join(sorted(aliases))
+        ))
+    cities.sort()
+
+    # Grouped by country, 3 decimals (~100 m): about 1 MB compressed
+    with gzip.open(out_dir / "cities.tsv.gz", "wt", encoding="utf-8", compresslevel=9) as handle:
+        for country, population, name, lat, lng, tz, aliases in cities:
+            handle.write(f"{name}\t{country}\t{lat:.3f}\t{lng:.3f}\t{tz}\t{-population}\t{aliases}\n")
+
+    logger.info(f"Gazetteer built: {len(cities)} cities, {len(countries)} countries")
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the bundled city gazetteer from GeoNames dumps")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("cities", help="GeoNames cities15000.txt")
+    parser.add_argument("countries", help="GeoNames countryInfo.txt")
+    parser.add_argument("--alternate-names", help="GeoNames alternateNamesV2.txt, for language-tagged aliases")
+    parser.add_argument("--languages", nargs="*", default=["en"], help="Alias languages with --alternate-names")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    build(args.cities, args.countries, alternate_names_txt=args.alternate_names, languages=tuple(args.languages))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+from app.config import settings
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+class HadithIndex:
+    """
+    Hadith number -> (book, position in book) per collection
+
+    Stored as one ``<collection>.idx`` file of flat uint32 triples
+    (number, book, position), loaded into a dict on first use.
+    """
+
+    def __init__(self, index_dir: str):
+        self.index_dir = Path(index_dir)
+        self._collections: Dict[str, Optional[Dict[int, Tuple[int, int]]]] = {}
+
+    def _path(self, collection: str) -> Path:
+        return self.index_dir / f"{collection}.idx"
+
+    def _load(self, collection: str) -> Optional[Dict[int, Tuple[int, int]]]:
+        if collection not in self._collections:
+            entries = None
+            try:
+                flat = array("I", self._path(collection).read_bytes())
+                entries = {
+                    flat[i]: (flat[i + 1], flat[i + 2])
+                    for i in range(0, len(flat), 3)
+                }
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.error(f"Unreadable hadith index for {collection}: {str(e)}")
+            self._collections[collection] = entries
+        return self._collections[collection]
+
+    def has_collection(self, collection: str) -> bool:
+        return self._load(collection) is not None
+
+    def lookup(self, collection: str, hadith_number: int) -> Optional[Tuple[int, int]]:
+        """(book_number, position) of a hadith, None if not indexed"""
+        entries = self._load(collection)
+        return entries.get(hadith_number) if entries else None
+
+    def write(self, collection: str, entries: Dict[int, Tuple[int, int]]):
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+
+        flat = array("I")
+        for number in sorted(entries):
+            book, position = entries[number]
+            flat.extend((number, book, position))
+
+        tmp = self._path(collection).with_suffix(".tmp")
+        tmp.write_bytes(flat.tobytes())
+        os.replace(tmp, self._path(collection))
+        self._collections[collection] = dict(entries)
+
+hadith_index = HadithIndex(settings.HADITH_INDEX_DIR)
+
+async def build_index(collections: Iterable[str], concurrency: int = 8):
+    """Scan every book (CDN section) of each collection once and write its index"""
+    from app.services.hadith_service import HadithService
+    from app.services.http_clients import upstream_clients
+
+    service = HadithService()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def scan(collection: str, book_number: int):
+        async with semaphore:
+            return book_number, await service._get_book(collection, book_number)
+
+    try:
+        for collection in collections:
+            books = service.collections[collection]["books"]
+            entries: Dict[int, Tuple[int, int]] = {}
+
+            for book_number, book in sorted(await asyncio.gather(
+                *(scan(collection, n) for n in range(1, books + 1))
+            )):
+                for position, hadith in enumerate((book or {}).get("hadiths", [])):
+                    number = hadith.get("hadithnumber")
+                    # Sub-numbered hadiths (e.g. 12.2) are reached through their book
+                    if isinstance(number, float) and number.is_integer():
+                        number = int(number)
+                    if isinstance(number, int) and number not in entries:
+                        entries[number] = (book_number, position)
+
+            hadith_index.write(collection, entries)
+            logger.info(f"Indexed {collection}: {len(entries)} hadiths in {books} books")
+    finally:
+        await upstream_clients.shutdown()
+
+def main():
+    import argparse
+    from app.services.hadith_service import HadithService
+
+    collections = list(HadithService().collections)
+
+    parser = argparse.ArgumentParser(description="Build the hadith number index")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("--collections", nargs="*", choices=collections, default=collections)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    asyncio.run(build_index(args.collections, args.concurrency))
+
+if __name__ == "__main__":
+    main()
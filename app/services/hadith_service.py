@@ -1,7 +1,15 @@
-import httpx
 from app.config import settings
+from app.services.http_clients import upstream_clients
+from app.services.hadith_cache import hadith_book_cache
+from app.services.hadith_index import hadith_index
+from app.utils.single_flight import single_flight
+import asyncio
+import httpx
+import json
 import logging
-from typing import Dict, Optional, List
+import os
+from pathlib import Path
+from typing import Dict, Optional, List, Tuple
 import random
 
 logger = logging.getLogger(__name__)
@@ -9,7 +17,12 @@ logger = logging.getLogger(__name__)
 class HadithService:
     def __init__(self):
         self.base_url = settings.HADITH_API_URL
-        self.timeout = 10.0
+        self.cache = hadith_book_cache
+        self.index = hadith_index
+        
+        # Index into _book_urls() of the format that works, per collection
+        self.url_formats_path = Path(settings.HADITH_CACHE_DIR) / "url_formats.json"
+        self.url_formats = self._load_url_formats()
         
         # Updated collections with proper format
         self.collections = {
@@ -45,12 +58,18 @@ class HadithService:
             }
         }
     
+    @property
+    def client(self):
+        """Shared pooled client for the hadith upstream"""
+        return upstream_clients.get("hadith")
+    
     async def get_hadith(
         self,
         collection: str = "bukhari",
-        book_number: int = 1
+        book_number: int = 1,
+        position: int = 0
     ) -> Optional[Dict]:
-        """Get hadith from specific collection and book"""
+        """Get hadith from specific collection and book (first hadith by default)"""
         try:
             # Normalize collection name
             collection = collection.lower()
@@ -67,49 +86,178 @@ class HadithService:
                 # Return first book instead of error
                 book_number = 1
             
-            # Try different URL formats
-            url_formats = [
-                f"{self.base_url}/editions/{collection_info['prefix']}/{book_number}.json",
-                f"{self.base_url}/editions/{collection}/{book_number}.json",
-                f"{self.base_url}/editions/eng-{collection}/{book_number}.json"
-            ]
+            book = await self._get_book(collection, book_number)
+            hadiths = book.get("hadiths", []) if book else []
             
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                for url in url_formats:
-                    try:
-                        logger.info(f"Trying URL: {url}")
-                        response = await client.get(url)
-                        response.raise_for_status()
-                        data = response.json()
-                        
-                        hadiths = data.get("hadiths", [])
-                        
-                        if not hadiths:
-                            continue
-                        
-                        # Return first hadith from the book
-                        hadith = hadiths[0]
-                        
-                        return {
-                            "collection": collection_info["name"],
-                            "book_number": book_number,
-                            "hadith_number": hadith.get("hadithnumber", 1),
-                            "text": hadith.get("text", ""),
-                            "arabic": hadith.get("arabic", ""),
-                            "reference": hadith.get("reference", {})
-                        }
-                    except Exception as e:
-                        logger.warning(f"Failed with URL {url}: {str(e)}")
-                        continue
-                
-                # If all formats failed, return error
-                logger.error(f"All URL formats failed for {collection}, book {book_number}")
+            if not 0 <= position < len(hadiths):
+                logger.error(f"No hadith found for {collection}, book {book_number}, position {position}")
                 return None
-                
+            
+            return self._format_hadith(collection, book_number, hadiths[position])
+            
         except Exception as e:
             logger.error(f"Error fetching hadith: {str(e)}")
             return None
     
+    def _format_hadith(self, collection: str, book_number: int, hadith: Dict) -> Dict:
+        return {
+            "collection": self.collections[collection]["name"],
+            "book_number": book_number,
+            "hadith_number": hadith.get("hadithnumber", 1),
+            "text": hadith.get("text", ""),
+            "arabic": hadith.get("arabic", ""),
+            "reference": hadith.get("reference", {})
+        }
+    
+    def _book_urls(self, collection: str, book_number: int) -> List[str]:
+        """
+        Candidate URL formats for a book
+        
+        Books are the CDN's sections; /editions/{edition}/{n}.json without
+        sections/ is the single hadith numbered n.
+        """
+        collection_info = self.collections[collection]
+        return [
+            f"{self.base_url}/editions/{collection_info['prefix']}/sections/{book_number}.json",
+            f"{self.base_url}/editions/{collection}/sections/{book_number}.json",
+            f"{self.base_url}/editions/eng-{collection}/sections/{book_number}.json"
+        ]
+    
+    async def _get_book(self, collection: str, book_number: int) -> Optional[Dict]:
+        """
+        Parsed book JSON, from memory, disk or the CDN
+        
+        Stale disk entries are revalidated with If-None-Match, and served
+        as-is if the CDN cannot be reached.
+        """
+        # Distinct from the single-hadith files cached under "{collection}-{n}" before
+        key = f"{collection}-section-{book_number}"
+        
+        book = self.cache.get(key)
+        if book is not None:
+            return book
+        
+        # Concurrent misses for the same book share one load
+        return await single_flight.do(
+            ("hadith-book", key),
+            lambda: self._load_book(collection, book_number, key)
+        )
+    
+    async def _load_book(self, collection: str, book_number: int, key: str) -> Optional[Dict]:
+        cached = await asyncio.to_thread(self.cache.load, key)
+        if cached:
+            raw, meta = cached
+            
+            if not self.cache.is_fresh(meta):
+                try:
+                    headers = {"If-None-Match": meta["etag"]} if meta.get("etag") else {}
+                    response = await self.client.get(meta["url"], headers=headers)
+                    
+                    if response.status_code == 304:
+                        self.cache.record("revalidated")
+                        await asyncio.to_thread(self.cache.touch, key, meta)
+                    else:
+                        response.raise_for_status()
+                        book = await asyncio.to_thread(json.loads, response.content)
+                        await self._store_book(key, response, book)
+                        return book
+                except Exception as e:
+                    logger.warning(f"Revalidation failed for {key}, serving cached copy: {str(e)}")
+            else:
+                self.cache.record("disk_hits")
+            
+            book = await asyncio.to_thread(json.loads, raw)
+            self.cache.put(key, book, len(raw))
+            return book
+        
+        urls = self._book_urls(collection, book_number)
+        
+        # Only the format that worked before for this collection
+        known = self.url_formats.get(collection)
+        if known is not None:
+            try:
+                response, book = await self._fetch_book_url(urls[known])
+                await self._store_book(key, response, book)
+                return book
+            except Exception as e:
+                logger.warning(f"Known URL format failed for {collection}, book {book_number}: {str(e)}")
+        
+        # Otherwise race all formats and keep the first that returns hadiths
+        winner = await self._race_urls([url for i, url in enumerate(urls) if i != known])
+        if winner is None:
+            logger.error(f"All URL formats failed for {collection}, book {book_number}")
+            return None
+        
+        url, response, book = winner
+        await self._remember_url_format(collection, urls.index(url))
+        await self._store_book(key, response, book)
+        return book
+    
+    async def _fetch_book_url(self, url: str) -> Tuple[httpx.Response, Dict]:
+        """Download and parse a book, raising unless it contains hadiths"""
+        logger.info(f"Trying URL: {url}")
+        response = await self.client.get(url)
+        response.raise_for_status()
+        
+        book = await asyncio.to_thread(json.loads, response.content)
+        if not book.get("hadiths"):
+            raise ValueError("No hadiths in response")
+        return response, book
+    
+    async def _race_urls(self, urls: List[str]) -> Optional[Tuple[str, httpx.Response, Dict]]:
+        """Request all URLs at once, return the first success and cancel the rest"""
+        tasks = {asyncio.create_task(self._fetch_book_url(url)): url for url in urls}
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return (tasks[task], *task.result())
+                    logger.warning(f"Failed with URL {tasks[task]}: {str(task.exception())}")
+            return None
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    def _load_url_formats(self) -> Dict[str, int]:
+        try:
+            return json.loads(self.url_formats_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable URL format file: {str(e)}")
+            return {}
+    
+    async def _remember_url_format(self, collection: str, index: int):
+        """Persist the working URL format so later calls skip the others"""
+        if self.url_formats.get(collection) == index:
+            return
+        
+        self.url_formats[collection] = index
+        formats = dict(self.url_formats)
+        
+        def write():
+            self.url_formats_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.url_formats_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(formats), encoding="utf-8")
+            os.replace(tmp, self.url_formats_path)
+        
+        try:
+            await asyncio.to_thread(write)
+        except Exception as e:
+            logger.warning(f"Could not persist URL format for {collection}: {str(e)}")
+    
+    async def _store_book(self, key: str, response: httpx.Response, book: Dict):
+        """Write a downloaded book to both cache tiers"""
+        raw = response.content
+        
+        self.cache.record("downloads")
+        await asyncio.to_thread(
+            self.cache.save, key, raw, str(response.url), response.headers.get("etag")
+        )
+        self.cache.put(key, book, len(raw))
+    
     async def get_random_hadith(self) -> Optional[Dict]:
         """Get a random hadith"""
         try:
@@ -144,17 +292,29 @@ class HadithService:
     ) -> Optional[Dict]:
         """
         Get specific hadith by its number
-        Note: This requires knowing which book it's in
+        
+        Uses the prebuilt index (python -m app.services.hadith_index build).
+        Without one, the hadith is fetched from the CDN's per-number URL.
         """
-        # For now, search through books (not efficient, but works)
-        collection_info = self.collections.get(collection.lower())
+        collection = collection.lower()
+        collection_info = self.collections.get(collection)
         if not collection_info:
             return None
         
-        # Try first few books
-        for book_num in range(1, min(5, collection_info["books"] + 1)):
-            result = await self.get_hadith(collection, book_num)
-            if result and result.get("hadith_number") == hadith_number:
-                return result
+        if self.index.has_collection(collection):
+            location = self.index.lookup(collection, hadith_number)
+            if location is None:
+                return None
+            book_number, position = location
+            return await self.get_hadith(collection, book_number, position)
+        
+        url = f"{self.base_url}/editions/{collection_info['prefix']}/{hadith_number}.json"
+        try:
+            _, data = await self._fetch_book_url(url)
+        except Exception as e:
+            logger.error(f"Error fetching hadith {collection} {hadith_number}: {str(e)}")
+            return None
         
-        return None
\ No newline at end of file
+        hadith = data["hadiths"][0]
+        book_number = (hadith.get("reference") or {}).get("book", 0)
+        return self._format_hadith(collection, book_number, hadith)
@@ -0,0 +1,134 @@
+import httpx
+from app.config import settings
+import logging
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamClients:
+    """
+    App-wide pooled HTTP clients, one per upstream API
+
+    Clients are opened in the FastAPI lifespan hook and shared by every
+    service instance, so keep-alive connections (and HTTP/2 streams) are
+    reused across requests instead of paying a TCP+TLS handshake per call.
+    """
+
+    def __init__(self):
+        self.base_urls = {
+            "quran": settings.QURAN_API_URL,
+            "hadith": settings.HADITH_API_URL,
+            "aladhan": settings.ALADHAN_API_URL,
+            "elevenlabs": settings.ELEVENLABS_API_URL
+        }
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._stats: Dict[str, Dict] = {}
+
+    def _build_client(self, name: str) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+        )
+        timeout = httpx.Timeout(
+            settings.HTTP_READ_TIMEOUT,
+            connect=settings.HTTP_CONNECT_TIMEOUT,
+            pool=settings.HTTP_POOL_TIMEOUT
+        )
+
+        http2 = settings.HTTP2_ENABLED
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("HTTP/2 requested but 'h2' is not installed, falling back to HTTP/1.1")
+                http2 = False
+
+        self._stats[name] = {"requests": 0, "peak_in_flight": 0, "saturated": 0}
+
+        async def on_request(request: httpx.Request):
+            self._record_request(name)
+
+        return httpx.AsyncClient(
+            limits=limits,
+            timeout=timeout,
+            http2=http2,
+            event_hooks={"request": [on_request]}
+        )
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        """Return the shared client for an upstream, creating it on first use"""
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._build_client(name)
+            self._clients[name] = client
+        return client
+
+    async def startup(self):
+        """Open a client for every known upstream"""
+        for name in self.base_urls:
+            self.get(name)
+        logger.info(f"Upstream HTTP clients ready: {', '.join(self._clients)}")
+
+    async def shutdown(self):
+        """Close all clients and their pooled connections"""
+        for name, client in list(self._clients.items()):
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"Error closing {name} client: {str(e)}")
+        self._clients.clear()
+
+    def _pool(self, name: str):
+        client = self._clients.get(name)
+        if client is None:
+            return None
+        # httpx does not expose the connection pool publicly
+        return getattr(client._transport, "_pool", None)
+
+    def _record_request(self, name: str):
+        stats = self._stats[name]
+        stats["requests"] += 1
+
+        pool = self._pool(name)
+        if pool is None:
+            return
+
+        in_flight = len(getattr(pool, "_requests", [])) + 1
+        stats["peak_in_flight"] = max(stats["peak_in_flight"], in_flight)
+        if len(pool.connections) >= settings.HTTP_MAX_CONNECTIONS:
+            stats["saturated"] += 1
+
+    def pool_stats(self) -> Dict[str, Optional[Dict]]:
+        """
+        Snapshot of connection pool usage per upstream
+
+        - **connections**: open connections (active + idle)
+        - **in_flight** / **queued**: requests using or waiting for a connection
+        - **saturated**: requests issued while the pool was at max_connections
+        """
+        result = {}
+        for name in self.base_urls:
+            pool = self._pool(name)
+            if pool is None:
+                result[name] = None
+                continue
+
+            connections = pool.connections
+            requests = getattr(pool, "_requests", [])
+            idle = sum(1 for c in connections if c.is_idle())
+
+            result[name] = {
+                "connections": len(connections),
+                "active": len(connections) - idle,
+                "idle": idle,
+                "in_flight": len(requests),
+                "queued": sum(1 for r in requests if r.is_queued()),
+                "max_connections": settings.HTTP_MAX_CONNECTIONS,
+                **self._stats.get(name, {})
+            }
+        return result
+
+
+upstream_clients = UpstreamClients()
@@ -0,0 +1,141 @@
+from app.config import settings
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class LLMCache:
+    """
+    Content-addressed cache of LLM completions
+
+    Keys hash everything that determines the output. Entries live in
+    SQLite (WAL mode, point lookups by primary key) with an in-process LRU
+    in front, so repeat hits never leave memory. The LRU is checked on the
+    event loop; SQLite reads and writes run in a worker thread, where a
+    write lock held by another process only delays that request.
+    """
+
+    def __init__(self, path: str, ttl_seconds: int, memory_entries: int):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.memory_entries = memory_entries
+
+        self._memory: "OrderedDict[str, Tuple[str, int, float]]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "tokens_saved": 0
+        }
+
+    @staticmethod
+    def key(model: str, system_prompt: str, user_prompt: str, language: str, temperature: float) -> str:
+        payload = json.dumps(
+            [model, system_prompt, user_prompt, str(language), temperature],
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        with self._db_lock:
+            if self._db is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute("PRAGMA synchronous=NORMAL")
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS completions ("
+                    "key TEXT PRIMARY KEY, content TEXT NOT NULL, "
+                    "tokens INTEGER NOT NULL, expires_at REAL NOT NULL)"
+                )
+                self._db = db
+            return self._db
+
+    def _remember(self, key: str, entry: Tuple[str, int, float]):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _read(self, key: str, now: float) -> Optional[Tuple[str, int, float]]:
+        try:
+            return self.db.execute(
+                "SELECT content, tokens, expires_at FROM completions WHERE key = ? AND expires_at > ?",
+                (key, now)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache read failed: {str(e)}")
+            return None
+
+    def _write(self, key: str, entry: Tuple[str, int, float]):
+        try:
+            self.db.execute(
+                "INSERT OR REPLACE INTO completions (key, content, tokens, expires_at) VALUES (?, ?, ?, ?)",
+                (key, *entry)
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache write failed: {str(e)}")
+
+    async def get(self, key: str) -> Optional[str]:
+        now = time.time()
+
+        entry = self._memory.get(key)
+        if entry is not None and entry[2] > now:
+            self._memory.move_to_end(key)
+            self._stats["memory_hits"] += 1
+            self._stats["tokens_saved"] += entry[1]
+            return entry[0]
+
+        row = await asyncio.to_thread(self._read, key, now)
+        if row is None:
+            self._memory.pop(key, None)
+            self._stats["misses"] += 1
+            return None
+
+        self._remember(key, row)
+        self._stats["disk_hits"] += 1
+        self._stats["tokens_saved"] += row[1]
+        return row[0]
+
+    async def set(self, key: str, content: str, tokens: int = 0):
+        entry = (content, tokens, time.time() + self.ttl_seconds)
+        self._remember(key, entry)
+        await asyncio.to_thread(self._write, key, entry)
+
+    def purge_expired(self) -> int:
+        try:
+            return self.db.execute("DELETE FROM completions WHERE expires_at <= ?", (time.time(),)).rowcount
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache purge failed: {str(e)}")
+            return 0
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def stats(self) -> Dict:
+        hits = self._stats["memory_hits"] + self._stats["disk_hits"]
+        lookups = hits + self._stats["misses"]
+        return {
+            **self._stats,
+            "hit_ratio": round(hits / lookups, 4) if lookups else None,
+            "memory_entries": len(self._memory)
+        }
+
+llm_cache = LLMCache(
+    settings.LLM_CACHE_PATH,
+    settings.LLM_CACHE_TTL_SECONDS,
+    settings.LLM_CACHE_MEMORY_ENTRIES
+)
@@ -0,0 +1,159 @@
+from app.config import settings
+from app.models.schemas import LanguageEnum
+from app.services.openai_service import OpenAIService
+from app.utils.single_flight import single_flight
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import AsyncIterator, Dict, Optional
+import asyncio
+import fcntl
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+class NaseehahScheduler:
+    """
+    One daily naseehah per language per calendar day, generated ahead of time
+
+    Across all timezones the local date is always yesterday, today or
+    tomorrow in UTC, so the refresher keeps those three days generated for
+    every language. Tomorrow is pre-generated. Results are persisted to a
+    JSON file and served from memory.
+
+    Every worker process runs a scheduler over the same file. A missing
+    day and language is generated under a file lock (flock, released if
+    the holder dies) after re-reading the store, so only the first worker
+    generates it and the others pick up its text.
+    """
+
+    def __init__(self, path: str, refresh_seconds: int):
+        self.path = Path(path)
+        self.refresh_seconds = refresh_seconds
+        self.openai_service = OpenAIService()
+        self.lock_dir = self.path.parent / f"{self.path.stem}.locks"
+        self._days: Dict[str, Dict[str, Dict]] = self._load()
+        self._task: Optional[asyncio.Task] = None
+
+    def _load(self) -> Dict[str, Dict[str, Dict]]:
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable naseehah store: {str(e)}")
+            return {}
+
+    def _save(self, days: Dict):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(days, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def _store_entry(self, day: date, language: str, entry: Dict) -> Dict[str, Dict[str, Dict]]:
+        """Add an entry to the file, merged with other workers' writes; returns the store"""
+        self.lock_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_dir / "store.lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            days = self._load()
+            days.setdefault(day.isoformat(), {})[language] = entry
+
+            # Keep a few days around for late timezones, drop the rest
+            oldest = (datetime.now(timezone.utc).date() - timedelta(days=2)).isoformat()
+            days = {d: v for d, v in days.items() if d >= oldest}
+            self._save(days)
+
+            for path in self.lock_dir.glob("*.*.lock"):
+                if path.name < oldest:
+                    path.unlink(missing_ok=True)
+        return days
+
+    @asynccontextmanager
+    async def _locked(self, day: date, language: str) -> AsyncIterator[None]:
+        """Exclusive across worker processes for one day and language"""
+        await asyncio.to_thread(self.lock_dir.mkdir, parents=True, exist_ok=True)
+        handle = open(self.lock_dir / f"{day.isoformat()}.{language}.lock", "a")
+        try:
+            while True:
+                try:
+                    fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    # Another worker is generating it
+                    await asyncio.sleep(0.5)
+            yield
+        finally:
+            handle.close()
+
+    def get(self, day: date, language: str) -> Optional[Dict]:
+        """Stored naseehah for a day, None if not generated yet"""
+        return self._days.get(day.isoformat(), {}).get(language)
+
+    async def ensure(self, day: date, language: str) -> Dict:
+        """Stored naseehah for a day, generating it once if missing"""
+        stored = self.get(day, language)
+        if stored:
+            return stored
+        return await single_flight.do(
+            ("daily-naseehah", day.isoformat(), language),
+            lambda: self._generate(day, language)
+        )
+
+    async def _generate(self, day: date, language: str) -> Dict:
+        async with self._locked(day, language):
+            # Another worker may have generated it first
+            self._days = await asyncio.to_thread(self._load)
+            stored = self.get(day, language)
+            if stored:
+                return stored
+
+            result = await self.openai_service.generate_daily_naseehah(language=language)
+            if not result.get("success"):
+                # Serve the fallback text but retry on the next refresh
+                return result
+
+            entry = {"naseehah": result["naseehah"], "reference": result.get("reference")}
+            try:
+                self._days = await asyncio.to_thread(self._store_entry, day, language, entry)
+            except Exception as e:
+                logger.warning(f"Could not persist daily naseehah: {str(e)}")
+                self._days.setdefault(day.isoformat(), {})[language] = entry
+
+        logger.info(f"Generated daily naseehah for {day.isoformat()} ({language})")
+        return entry
+
+    async def refresh(self):
+        """Make sure yesterday, today and tomorrow (UTC) exist for every language"""
+        today = datetime.now(timezone.utc).date()
+        for offset in (0, 1, -1):
+            day = today + timedelta(days=offset)
+            for language in LanguageEnum:
+                await self.ensure(day, language.value)
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Daily naseehah refresh error: {str(e)}")
+            await asyncio.sleep(self.refresh_seconds)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+naseehah_scheduler = NaseehahScheduler(
+    settings.NASEEHAH_STORE_PATH,
+    settings.NASEEHAH_REFRESH_SECONDS
+)
@@ -1,16 +1,204 @@
-from openai import OpenAI
+from openai import AsyncOpenAI
 from app.config import settings
 from app.utils.prompts import SufiPrompts
-from typing import List, Dict, Optional
+from app.utils.concurrency import ConcurrencyLimiter
+from app.services.llm_cache import llm_cache
+from app.utils.single_flight import single_flight
+from app.utils.tokens import count_message_tokens
+from app.services.chat_history import HistoryManager
+from typing import AsyncIterator, BinaryIO, List, Dict, Optional
+import asyncio
+import httpx
+import json
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
+_client: Optional[AsyncOpenAI] = None
+
+# Shared by every OpenAIService instance (one per router module)
+openai_limiter = ConcurrencyLimiter(
+    settings.OPENAI_MAX_CONCURRENCY,
+    key_limits=settings.OPENAI_ENDPOINT_CONCURRENCY
+)
+
+def get_openai_client() -> AsyncOpenAI:
+    """Shared non-blocking OpenAI client, sized for OPENAI_MAX_CONCURRENCY"""
+    global _client
+    if _client is None:
+        _client = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            timeout=settings.OPENAI_TIMEOUT,
+            max_retries=settings.OPENAI_MAX_RETRIES,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=settings.OPENAI_MAX_CONCURRENCY,
+                    max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS
+                )
+            )
+        )
+    return _client
+
+# Streaming chat counters, reported on /health/stats
+_stream_stats = {
+    "streams": 0,
+    "completed": 0,
+    "disconnected": 0,
+    "failed": 0,
+    "ttft_ms_total": 0.0,
+    "ttft_ms_max": 0.0,
+    "ttft_samples": 0
+}
+
+def chat_stream_stats() -> Dict:
+    samples = _stream_stats["ttft_samples"]
+    return {
+        "streams": _stream_stats["streams"],
+        "completed": _stream_stats["completed"],
+        "disconnected": _stream_stats["disconnected"],
+        "failed": _stream_stats["failed"],
+        "ttft_ms_avg": round(_stream_stats["ttft_ms_total"] / samples, 1) if samples else None,
+        "ttft_ms_max": round(_stream_stats["ttft_ms_max"], 1)
+    }
+
+async def close_openai_client():
+    """Close the shared OpenAI client and its connection pool"""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
 class OpenAIService:
     def __init__(self):
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
-        self.model = "gpt-4-turbo-preview"  # or "gpt-4" or "gpt-3.5-turbo"
+        self.model = settings.OPENAI_MODEL
         self.prompts = SufiPrompts()
+        self.history = HistoryManager(self._summarize_history, self.model)
+    
+    @property
+    def client(self) -> AsyncOpenAI:
+        return get_openai_client()
+    
+    async def _complete(
+        self,
+        endpoint: str,
+        messages: List[Dict],
+        temperature: float,
+        max_tokens: int,
+        coalesce: bool = False
+    ):
+        """
+        Run a chat completion within the global and per-endpoint in-flight limits
+        
+        With coalesce=True, identical concurrent requests share one API call.
+        """
+        async def create():
+            async with openai_limiter.acquire(endpoint):
+                return await self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens
+                )
+        
+        if not coalesce:
+            return await create()
+        
+        key = json.dumps([self.model, messages, temperature, max_tokens], ensure_ascii=False)
+        return await single_flight.do(("openai-" + endpoint, key), create)
+    
+    async def _cached_complete(
+        self,
+        endpoint: str,
+        system_prompt: str,
+        user_prompt: str,
+        language: str,
+        temperature: float,
+        max_tokens: int
+    ) -> str:
+        """Completion text served from the LLM cache when the same prompt was answered before"""
+        key = llm_cache.key(self.model, system_prompt, user_prompt, language, temperature)
+        
+        cached = await llm_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        response = await self._complete(
+            endpoint,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            temperature=temperature,
+            max_tokens=max_tokens,
+            coalesce=True
+        )
+        
+        content = response.choices[0].message.content
+        await llm_cache.set(key, content, response.usage.total_tokens)
+        return content
+    
+    async def transcribe_audio(
+        self,
+        file: BinaryIO,
+        filename: str,
+        content_type: Optional[str] = None
+    ) -> str:
+        """
+        Transcribe an audio file with Whisper
+        
+        The file object is streamed to the API rather than read into memory.
+        Errors and timeouts are raised to the caller.
+        """
+        async with openai_limiter.acquire("transcription"):
+            transcription = await self.client.audio.transcriptions.create(
+                model=settings.WHISPER_MODEL,
+                file=(filename, file, content_type),
+                timeout=settings.WHISPER_TIMEOUT
+            )
+        
+        return transcription.text
+    
+    async def _summarize_history(self, summary: str, turns: List[Dict], language: str) -> str:
+        """Fold a block of turns into the running conversation summary (cached)"""
+        transcript = "\n".join(
+            f"{'Seeker' if turn['role'] == 'user' else 'Al Murshid'}: {turn['content']}"
+            for turn in turns
+        )
+        return await self._cached_complete(
+            "history_summary",
+            system_prompt="You summarize spiritual guidance conversations faithfully and briefly, in the conversation's language.",
+            user_prompt=self.prompts.get_history_summary_prompt(summary, transcript),
+            language=language,
+            temperature=0.3,
+            max_tokens=settings.HISTORY_SUMMARY_MAX_TOKENS
+        )
+    
+    async def _murshid_messages(
+        self,
+        message: str,
+        language: str,
+        conversation_history: Optional[List[Dict]]
+    ) -> List[Dict]:
+        """Build the chat messages for the Murshid within the history token budget"""
+        summary, recent = await self.history.fit(conversation_history, language)
+        
+        system_prompt = f"{self.prompts.MURSHID_SYSTEM_PROMPT}\n\n{self.prompts.get_language_instruction(language)}"
+        if summary:
+            system_prompt += f"\n\nEarlier in this conversation: {summary}"
+        
+        messages = [{"role": "system", "content": system_prompt}]
+        
+        # Recent turns verbatim, older ones only through the summary
+        messages.extend(recent)
+        
+        # Add current message
+        messages.append({
+            "role": "user",
+            "content": message
+        })
+        
+        return messages
     
     async def chat_with_murshid(
         self,
@@ -20,38 +208,23 @@ class OpenAIService:
     ) -> Dict:
         """Main AI Murshid chat function"""
         try:
-            # Build messages
-            messages = [
-                {
-                    "role": "system",
-                    "content": f"{self.prompts.MURSHID_SYSTEM_PROMPT}\n\n{self.prompts.get_language_instruction(language)}"
-                }
-            ]
-            
-            # Add conversation history if provided
-            if conversation_history:
-                messages.extend(conversation_history[-5:])  # Last 5 messages for context
-            
-            # Add current message
-            messages.append({
-                "role": "user",
-                "content": message
-            })
+            messages = await self._murshid_messages(message, language, conversation_history)
             
             # Call OpenAI
-            response = self.client.chat.completions.create(
-                model=self.model,
+            response = await self._complete(
+                "chat",
                 messages=messages,
                 temperature=0.7,
                 max_tokens=800
             )
             
             assistant_message = response.choices[0].message.content
-            tokens_used = response.usage.total_tokens
             
             return {
                 "response": assistant_message,
-                "tokens_used": tokens_used,
+                "tokens_used": response.usage.total_tokens,
+                "prompt_tokens": response.usage.prompt_tokens,
+                "completion_tokens": response.usage.completion_tokens,
                 "success": True
             }
             
@@ -64,6 +237,78 @@ class OpenAIService:
                 "error": str(e)
             }
     
+    async def stream_chat_with_murshid(
+        self,
+        message: str,
+        language: str = "en",
+        conversation_history: Optional[List[Dict]] = None
+    ) -> AsyncIterator[Dict]:
+        """
+        Murshid chat, streamed as it is generated
+        
+        Yields {"type": "token", "content": ...} for each text delta, then one
+        {"type": "done", "tokens_used", "prompt_tokens", "completion_tokens",
+        "ttft_ms"}. Streams carry no usage, so prompt tokens are counted
+        locally and completion tokens are the streamed chunks. If the consumer
+        stops iterating (client disconnect), the upstream request is closed.
+        Errors are raised.
+        """
+        messages = await self._murshid_messages(message, language, conversation_history)
+        prompt_tokens = count_message_tokens(messages, self.model)
+        started = time.perf_counter()
+        ttft_ms = None
+        tokens = 0
+        finished = False
+        
+        _stream_stats["streams"] += 1
+        try:
+            async with openai_limiter.acquire("chat"):
+                stream = await self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=0.7,
+                    max_tokens=800,
+                    stream=True
+                )
+                try:
+                    async for chunk in stream:
+                        if not chunk.choices:
+                            continue
+                        content = chunk.choices[0].delta.content
+                        if not content:
+                            continue
+                        
+                        if ttft_ms is None:
+                            ttft_ms = (time.perf_counter() - started) * 1000
+                            _stream_stats["ttft_ms_total"] += ttft_ms
+                            _stream_stats["ttft_ms_max"] = max(_stream_stats["ttft_ms_max"], ttft_ms)
+                            _stream_stats["ttft_samples"] += 1
+                        
+                        tokens += 1
+                        yield {"type": "token", "content": content}
+                finally:
+                    await stream.close()
+            
+            finished = True
+            _stream_stats["completed"] += 1
+            yield {
+                "type": "done",
+                "tokens_used": prompt_tokens + tokens,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": tokens,
+                "ttft_ms": round(ttft_ms, 1) if ttft_ms is not None else None
+            }
+        
+        except (GeneratorExit, asyncio.CancelledError):
+            if not finished:
+                _stream_stats["disconnected"] += 1
+                logger.info(f"Chat stream closed by client after {tokens} tokens")
+            raise
+        except Exception as e:
+            _stream_stats["failed"] += 1
+            logger.error(f"OpenAI chat stream error: {str(e)}")
+            raise
+    
     async def explain_quran_verse(
         self,
         verse: str,
@@ -74,24 +319,15 @@ class OpenAIService:
         try:
             prompt = self.prompts.get_quran_explanation_prompt(verse, translation)
             
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": f"You are a Sufi Quranic scholar. {self.prompts.get_language_instruction(language)}"
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
+            return await self._cached_complete(
+                "quran_explanation",
+                system_prompt=f"You are a Sufi Quranic scholar. {self.prompts.get_language_instruction(language)}",
+                user_prompt=prompt,
+                language=language,
                 temperature=0.7,
                 max_tokens=600
             )
             
-            return response.choices[0].message.content
-            
         except Exception as e:
             logger.error(f"Quran explanation error: {str(e)}")
             return "Unable to provide explanation at this moment. Please try again."
@@ -105,24 +341,15 @@ class OpenAIService:
         try:
             prompt = self.prompts.get_hadith_explanation_prompt(hadith_text)
             
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": f"You are a Hadith scholar with Sufi understanding. {self.prompts.get_language_instruction(language)}"
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
+            return await self._cached_complete(
+                "hadith_explanation",
+                system_prompt=f"You are a Hadith scholar with Sufi understanding. {self.prompts.get_language_instruction(language)}",
+                user_prompt=prompt,
+                language=language,
                 temperature=0.7,
                 max_tokens=500
             )
             
-            return response.choices[0].message.content
-            
         except Exception as e:
             logger.error(f"Hadith explanation error: {str(e)}")
             return "Unable to provide explanation at this moment. Please try again."
@@ -137,8 +364,8 @@ class OpenAIService:
         try:
             prompt = self.prompts.get_spiritual_advice_prompt(topic, user_level)
             
-            response = self.client.chat.completions.create(
-                model=self.model,
+            response = await self._complete(
+                "spiritual_advice",
                 messages=[
                     {
                         "role": "system",
@@ -192,8 +419,8 @@ class OpenAIService:
         try:
             prompt = self.prompts.get_meditation_script_prompt(goal, duration)
             
-            response = self.client.chat.completions.create(
-                model=self.model,
+            response = await self._complete(
+                "meditation",
                 messages=[
                     {
                         "role": "system",
@@ -219,8 +446,8 @@ class OpenAIService:
         try:
             prompt = self.prompts.get_daily_naseehah_prompt()
             
-            response = self.client.chat.completions.create(
-                model=self.model,
+            response = await self._complete(
+                "daily_naseehah",
                 messages=[
                     {
                         "role": "system",
@@ -232,19 +459,22 @@ class OpenAIService:
                     }
                 ],
                 temperature=0.8,
-                max_tokens=300
+                max_tokens=300,
+                coalesce=True
             )
             
             naseehah = response.choices[0].message.content
             
             return {
                 "naseehah": naseehah,
-                "reference": "Quran/Hadith"  # Could be enhanced to extract actual reference
+                "reference": "Quran/Hadith",  # Could be enhanced to extract actual reference
+                "success": True
             }
             
         except Exception as e:
             logger.error(f"Daily naseehah error: {str(e)}")
             return {
                 "naseehah": "Remember Allah in all that you do.",
-                "reference": None
+                "reference": None,
+                "success": False
             }
\ No newline at end of file
@@ -0,0 +1,252 @@
+from datetime import date, datetime, timedelta, tzinfo
+from typing import Dict, List, NamedTuple, Optional, Union
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import numpy as np
+
+PRAYERS = ["fajr", "sunrise", "dhuhr", "asr", "maghrib", "isha"]
+
+class CalculationMethod(NamedTuple):
+    name: str
+    fajr: float                       # Sun angle below the horizon
+    isha: float                       # Angle, or minutes after maghrib if isha_minutes
+    isha_minutes: bool = False
+    maghrib: Optional[float] = None   # Angle, or minutes after sunset if maghrib_minutes; None means sunset
+    maghrib_minutes: bool = False
+    tune: Optional[Dict[str, float]] = None   # Minutes added per prayer, as Aladhan does
+    ramadan_isha: float = 0           # Extra minutes for isha during Ramadan
+
+# Keyed by the Aladhan `method` IDs so existing clients keep their numbers
+METHODS: Dict[int, CalculationMethod] = {
+    0: CalculationMethod("Shia Ithna-Ashari, Leva Institute, Qum", 16, 14, maghrib=4),
+    1: CalculationMethod("University of Islamic Sciences, Karachi", 18, 18),
+    2: CalculationMethod("Islamic Society of North America (ISNA)", 15, 15),
+    3: CalculationMethod("Muslim World League", 18, 17),
+    4: CalculationMethod("Umm Al-Qura University, Makkah", 18.5, 90, isha_minutes=True, ramadan_isha=30),
+    5: CalculationMethod("Egyptian General Authority of Survey", 19.5, 17.5),
+    7: CalculationMethod("Institute of Geophysics, University of Tehran", 17.7, 14, maghrib=4.5),
+    8: CalculationMethod("Gulf Region", 19.5, 90, isha_minutes=True),
+    9: CalculationMethod("Kuwait", 18, 17.5),
+    10: CalculationMethod("Qatar", 18, 90, isha_minutes=True),
+    11: CalculationMethod("Majlis Ugama Islam Singapura, Singapore", 20, 18),
+    12: CalculationMethod("Union Organization Islamic de France", 12, 12),
+    13: CalculationMethod(
+        "Diyanet İşleri Başkanlığı, Turkey", 18, 17,
+        tune={"sunrise": -7, "dhuhr": 5, "asr": 4, "maghrib": 7}
+    ),
+    14: CalculationMethod("Spiritual Administration of Muslims of Russia", 16, 15),
+    16: CalculationMethod("Dubai", 18.2, 18.2, tune={"dhuhr": 3, "maghrib": 3}),
+    17: CalculationMethod("Jabatan Kemajuan Islam Malaysia (JAKIM)", 20, 18),
+    18: CalculationMethod("Tunisia", 18, 18),
+    19: CalculationMethod("Algeria", 18, 17),
+    20: CalculationMethod("Kementerian Agama Republik Indonesia", 20, 18),
+    21: CalculationMethod("Morocco", 19, 17, tune={"dhuhr": 5, "maghrib": 5}),
+    22: CalculationMethod(
+        "Comunidade Islamica de Lisboa", 18, 77, isha_minutes=True,
+        maghrib=3, maghrib_minutes=True, tune={"dhuhr": 5}
+    ),
+    23: CalculationMethod("Ministry of Awqaf, Jordan", 18, 18, maghrib=5, maghrib_minutes=True),
+}
+
+# Aladhan `school`: shadow length factor for Asr
+SCHOOLS = {0: 1, 1: 2}    # 0 = Shafi'i, Maliki, Hanbali; 1 = Hanafi
+
+# Aladhan `latitudeAdjustmentMethod`
+MIDDLE_OF_NIGHT, ONE_SEVENTH, ANGLE_BASED = 1, 2, 3
+
+SUNRISE_ANGLE = 0.833     # Refraction plus the sun's semi-diameter
+
+def _sin(d):
+    return np.sin(np.radians(d))
+
+def _cos(d):
+    return np.cos(np.radians(d))
+
+def _tan(d):
+    return np.tan(np.radians(d))
+
+def _fix_hour(h):
+    return np.mod(h, 24)
+
+def _julian_day(days: List[date]) -> np.ndarray:
+    return np.array([d.toordinal() for d in days], dtype=float) + 1721424.5
+
+def _hijri_months(days: List[date]) -> np.ndarray:
+    """Month of the tabular Islamic calendar (Aladhan's arithmetic one), 9 = Ramadan"""
+    # Julian day number
+    l = np.array([d.toordinal() for d in days], dtype=np.int64) + 1721425 - 1948440 + 10632
+    n = (l - 1) // 10631
+    l = l - 10631 * n + 354
+    j = ((10985 - l) // 5316) * ((50 * l) // 17719) + (l // 5670) * ((43 * l) // 15238)
+    l = l - ((30 - j) // 15) * ((17719 * j) // 50) - (j // 16) * ((15238 * j) // 43) + 29
+    return (24 * l) // 709
+
+def _sun_position(jd: np.ndarray):
+    """(declination in degrees, equation of time in hours)"""
+    d = jd - 2451545.0
+    g = np.mod(357.529 + 0.98560028 * d, 360)
+    q = np.mod(280.459 + 0.98564736 * d, 360)
+    l = np.mod(q + 1.915 * _sin(g) + 0.020 * _sin(2 * g), 360)
+    e = 23.439 - 0.00000036 * d
+
+    ra = _fix_hour(np.degrees(np.arctan2(_cos(e) * _sin(l), _cos(l))) / 15)
+    declination = np.degrees(np.arcsin(_sin(e) * _sin(l)))
+    return declination, q / 15 - ra
+
+class PrayerTimeCalculator:
+    """
+    Prayer times from the sun's position, for many days at once
+
+    Follows the PrayTimes.org algorithm, on which Aladhan's calculations
+    are based. Every step works on NumPy arrays of days; a year's
+    timetable is one pass.
+    """
+
+    def __init__(
+        self,
+        method: int = 2,
+        school: int = 0,
+        latitude_adjustment: int = ANGLE_BASED
+    ):
+        if method not in METHODS:
+            raise ValueError(f"Unknown calculation method: {method}")
+        if school not in SCHOOLS:
+            raise ValueError(f"Unknown school: {school}")
+        if latitude_adjustment not in (0, MIDDLE_OF_NIGHT, ONE_SEVENTH, ANGLE_BASED):
+            raise ValueError(f"Unknown latitude adjustment method: {latitude_adjustment}")
+        self.method = METHODS[method]
+        self.asr_factor = SCHOOLS[school]
+        self.latitude_adjustment = latitude_adjustment
+
+    def compute(
+        self,
+        days: List[date],
+        latitude: float,
+        longitude: float,
+        utc_offsets: Union[float, np.ndarray]
+    ) -> Dict[str, np.ndarray]:
+        """Local times in hours per prayer, NaN where the sun never reaches the angle"""
+        jd = _julian_day(days) - longitude / (15 * 24)
+        method = self.method
+
+        def declination(hour: float) -> np.ndarray:
+            return _sun_position(jd + hour / 24)[0]
+
+        def mid_day(hour: float) -> np.ndarray:
+            return _fix_hour(12 - _sun_position(jd + hour / 24)[1])
+
+        def sun_angle_time(angle, hour: float, before_noon: bool = False) -> np.ndarray:
+            decl = declination(hour)
+            with np.errstate(invalid="ignore"):
+                t = np.degrees(np.arccos(
+                    (-_sin(angle) - _sin(decl) * _sin(latitude)) / (_cos(decl) * _cos(latitude))
+                )) / 15
+            noon = mid_day(hour)
+            return noon - t if before_noon else noon + t
+
+        def asr_time(hour: float) -> np.ndarray:
+            decl = declination(hour)
+            angle = -np.degrees(np.arctan(1 / (self.asr_factor + _tan(np.abs(latitude - decl)))))
+            return sun_angle_time(angle, hour)
+
+        # Approximate hour of each event, where the sun position is taken (as in PrayTimes)
+        times = {
+            "fajr": sun_angle_time(method.fajr, 5, before_noon=True),
+            "sunrise": sun_angle_time(SUNRISE_ANGLE, 6, before_noon=True),
+            "dhuhr": mid_day(12),
+            "asr": asr_time(13),
+            "sunset": sun_angle_time(SUNRISE_ANGLE, 18),
+            "maghrib": None if method.maghrib_minutes else sun_angle_time(method.maghrib or SUNRISE_ANGLE, 18),
+            "isha": None if method.isha_minutes else sun_angle_time(method.isha, 18)
+        }
+
+        shift = np.asarray(utc_offsets, dtype=float) - longitude / 15
+        times = {name: t + shift for name, t in times.items() if t is not None}
+
+        if self.latitude_adjustment:
+            times = self._adjust_high_latitudes(times)
+
+        if method.maghrib_minutes:
+            times["maghrib"] = times["sunset"] + method.maghrib / 60
+        if method.isha_minutes:
+            times["isha"] = times["maghrib"] + method.isha / 60
+
+        for name, minutes in (method.tune or {}).items():
+            times[name] = times[name] + minutes / 60
+        if method.ramadan_isha:
+            times["isha"] = times["isha"] + np.where(_hijri_months(days) == 9, method.ramadan_isha / 60, 0)
+        return {name: times[name] for name in PRAYERS}
+
+    def _night_portion(self, angle: float, night: np.ndarray) -> np.ndarray:
+        if self.latitude_adjustment == ANGLE_BASED:
+            return angle / 60 * night
+        if self.latitude_adjustment == ONE_SEVENTH:
+            return night / 7
+        return night / 2
+
+    def _adjust_high_latitudes(self, times: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Cap Fajr and Isha to a portion of the night where twilight lasts all night"""
+        method = self.method
+        night = _fix_hour(times["sunrise"] - times["sunset"])
+
+        portion = self._night_portion(method.fajr, night)
+        gap = _fix_hour(times["sunrise"] - times["fajr"])
+        adjust = np.isnan(times["fajr"]) | (gap > portion)
+        times["fajr"] = np.where(adjust, times["sunrise"] - portion, times["fajr"])
+
+        if not method.isha_minutes:
+            portion = self._night_portion(method.isha, night)
+            gap = _fix_hour(times["isha"] - times["sunset"])
+            adjust = np.isnan(times["isha"]) | (gap > portion)
+            times["isha"] = np.where(adjust, times["sunset"] + portion, times["isha"])
+
+        if method.maghrib is not None and not method.maghrib_minutes:
+            portion = self._night_portion(method.maghrib, night)
+            gap = _fix_hour(times["maghrib"] - times["sunset"])
+            adjust = np.isnan(times["maghrib"]) | (gap > portion)
+            times["maghrib"] = np.where(adjust, times["sunset"] + portion, times["maghrib"])
+        return times
+
+def resolve_timezone(tz: str) -> tzinfo:
+    """IANA timezone by name; raises ValueError for an unknown name"""
+    try:
+        return ZoneInfo(tz)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown timezone: {tz}")
+
+def utc_offsets(days: List[date], tz: tzinfo) -> np.ndarray:
+    """UTC offset in hours at local noon of each day, following DST"""
+    return np.array([
+        datetime(d.year, d.month, d.day, 12, tzinfo=tz).utcoffset().total_seconds() / 3600
+        for d in days
+    ])
+
+_CLOCK = [f"{m // 60:02d}:{m % 60:02d}" for m in range(24 * 60)] + [None]
+
+def format_times(times: Dict[str, np.ndarray]) -> List[Dict[str, Optional[str]]]:
+    """Per day {prayer: "HH:MM"}, rounded to the nearest minute; None if undefined"""
+    columns = {}
+    for name, t in times.items():
+        minutes = np.mod(np.floor(t * 60 + 0.5), 24 * 60)
+        # NaN maps to the None at the end of _CLOCK
+        index = np.where(np.isnan(minutes), 24 * 60, minutes).astype(int)
+        columns[name] = [_CLOCK[m] for m in index.tolist()]
+    return [dict(zip(columns, row)) for row in zip(*columns.values())]
+
+def prayer_timetable(
+    latitude: float,
+    longitude: float,
+    start: date,
+    days: int,
+    tz: tzinfo,
+    method: int = 2,
+    school: int = 0,
+    latitude_adjustment: int = ANGLE_BASED
+) -> List[Dict]:
+    """Formatted prayer times for `days` consecutive days from `start`"""
+    dates = [start + timedelta(days=i) for i in range(days)]
+    calculator = PrayerTimeCalculator(method, school, latitude_adjustment)
+    times = calculator.compute(dates, latitude, longitude, utc_offsets(dates, tz))
+    return [
+        {"date": d.isoformat(), "timings": timings}
+        for d, timings in zip(dates, format_times(times))
+    ]
@@ -0,0 +1,30 @@
+from typing import Union
+import numpy as np
+
+# Coordinates of the Kaaba, as used by Aladhan
+KAABA_LATITUDE = 21.4225241
+KAABA_LONGITUDE = 39.8261818
+
+def qibla_direction(
+    latitude: Union[float, np.ndarray],
+    longitude: Union[float, np.ndarray]
+) -> Union[float, np.ndarray]:
+    """
+    Initial great-circle bearing to the Kaaba, in degrees clockwise from true north
+
+    Works element-wise on arrays, so thousands of points are one call.
+    Raises ValueError for coordinates out of range.
+    """
+    lat = np.asarray(latitude, dtype=float)
+    lng = np.asarray(longitude, dtype=float)
+    if np.any(np.abs(lat) > 90) or np.any(np.abs(lng) > 180) or np.any(~np.isfinite(lat + lng)):
+        raise ValueError("Latitude must be within ±90 and longitude within ±180")
+
+    phi = np.radians(lat)
+    delta = np.radians(KAABA_LONGITUDE - lng)
+    bearing = np.degrees(np.arctan2(
+        np.sin(delta),
+        np.cos(phi) * np.tan(np.radians(KAABA_LATITUDE)) - np.sin(phi) * np.cos(delta)
+    ))
+    direction = np.mod(bearing, 360)
+    return float(direction) if direction.ndim == 0 else direction
@@ -0,0 +1,237 @@
+from app.services.quran_store import QuranStore, UTHMANI_LAYER, get_quran_store
+from functools import lru_cache
+from typing import Dict, List, Optional
+import base64
+import hashlib
+import heapq
+import json
+import logging
+import math
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Harakat, Quranic annotation marks, superscript alef and tatweel
+TASHKEEL = re.compile("[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED\u0640]")
+
+ARABIC_LETTER_FORMS = str.maketrans({
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",  # Alef with hamza/madda/wasla
+    "ى": "ي", "ی": "ي",                      # Alef maqsura, Farsi ya
+    "ة": "ه"                                 # Ta marbuta
+})
+
+# Footnote markers are dropped with their number, other tags keep their text
+FOOTNOTES = re.compile(r"<sup[^>]*>.*?</sup>", re.DOTALL)
+TAGS = re.compile(r"<[^>]+>")
+
+# \w does not match Indic vowel signs, so Devanagari and Bengali are listed explicitly
+TOKEN = re.compile(r"[\w\u0900-\u097F\u0980-\u09FF]+")
+PHRASE = re.compile(r'"([^"]+)"')
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+def normalize(text: str) -> str:
+    """Strip markup and tashkeel, unify Arabic letter forms and case"""
+    text = TAGS.sub(" ", FOOTNOTES.sub(" ", text))
+    text = TASHKEEL.sub("", text).translate(ARABIC_LETTER_FORMS)
+    return text.casefold()
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN.findall(normalize(text))
+
+class LayerIndex:
+    """Positional inverted index over one text layer of the corpus"""
+
+    def __init__(self, store: QuranStore, layer: str):
+        self.layer = layer
+        self.postings: Dict[str, Dict[int, List[int]]] = {}
+
+        doc_lengths = []
+        for doc in range(sum(store.verse_count(n) for n in range(1, 115))):
+            tokens = tokenize(store.text_at(layer, doc))
+            doc_lengths.append(len(tokens))
+            for position, term in enumerate(tokens):
+                self.postings.setdefault(term, {}).setdefault(doc, []).append(position)
+
+        self.doc_count = len(doc_lengths)
+        average = sum(doc_lengths) / max(self.doc_count, 1)
+
+        # Length-normalized BM25 term frequency per posting, so a query only
+        # multiplies by idf and sums
+        length_norm = [K1 * (1 - B + B * length / average) for length in doc_lengths]
+        self.weights: Dict[str, Dict[int, float]] = {
+            term: {
+                doc: len(positions) * (K1 + 1) / (len(positions) + length_norm[doc])
+                for doc, positions in postings.items()
+            }
+            for term, postings in self.postings.items()
+        }
+
+    def idf(self, term: str) -> float:
+        df = len(self.postings.get(term, ()))
+        return math.log(1 + (self.doc_count - df + 0.5) / (df + 0.5))
+
+    def _phrase_docs(self, phrase: List[str]) -> set:
+        lists = [self.postings.get(term) for term in phrase]
+        if not all(lists):
+            return set()
+
+        docs = set(lists[0])
+        for postings in lists[1:]:
+            docs &= postings.keys()
+
+        matches = set()
+        for doc in docs:
+            following = [set(postings[doc]) for postings in lists[1:]]
+            if any(
+                all(start + i + 1 in positions for i, positions in enumerate(following))
+                for start in lists[0][doc]
+            ):
+                matches.add(doc)
+        return matches
+
+    def search(self, terms: List[str], phrases: List[List[str]]) -> Dict[int, float]:
+        """
+        BM25 score per matching document
+
+        Every phrase must appear verbatim; free terms are OR-ed.
+        """
+        allowed = None
+        for phrase in phrases:
+            docs = self._phrase_docs(phrase)
+            allowed = docs if allowed is None else allowed & docs
+            if not allowed:
+                return {}
+
+        scores: Dict[int, float] = {}
+        for term in set(terms + [t for phrase in phrases for t in phrase]):
+            weights = self.weights.get(term)
+            if not weights:
+                continue
+            idf = self.idf(term)
+            if allowed is not None:
+                weights = {doc: weights[doc] for doc in allowed if doc in weights}
+            if not scores:
+                scores = {doc: idf * weight for doc, weight in weights.items()}
+                continue
+            for doc, weight in weights.items():
+                scores[doc] = scores.get(doc, 0.0) + idf * weight
+
+        return scores
+
+class QuranSearchEngine:
+    """
+    In-process ranked full-text search over the local corpus
+
+    One index per layer, built on first use (or by warm()). Building and
+    searching are CPU-bound; callers run them off the event loop.
+    """
+
+    def __init__(self, store: QuranStore):
+        self.store = store
+        self._indexes: Dict[str, LayerIndex] = {}
+        self._build_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+        # Global ayah position -> (surah, ayah)
+        self._keys = [
+            (surah, ayah)
+            for surah in range(1, 115)
+            for ayah in range(1, store.verse_count(surah) + 1)
+        ]
+
+    def index(self, layer: str) -> LayerIndex:
+        index = self._indexes.get(layer)
+        if index is not None:
+            return index
+
+        with self._lock:
+            build_lock = self._build_locks.setdefault(layer, threading.Lock())
+        # A search during warm() waits for the same build instead of repeating
+        # it, while searches on layers already built go straight through
+        with build_lock:
+            if layer not in self._indexes:
+                self._indexes[layer] = LayerIndex(self.store, layer)
+                logger.info(f"Built search index for {layer} ({len(self._indexes[layer].postings)} terms)")
+            return self._indexes[layer]
+
+    def warm(self):
+        """Build the index of every imported layer ahead of the first query"""
+        for layer in self.store.layers():
+            self.index(layer)
+
+    @staticmethod
+    def _cursor_scope(query: str, layer: str) -> str:
+        return hashlib.sha1(f"{layer}\0{query}".encode("utf-8")).hexdigest()[:8]
+
+    @classmethod
+    def encode_cursor(cls, query: str, layer: str, offset: int) -> str:
+        payload = json.dumps({"s": cls._cursor_scope(query, layer), "o": offset}).encode("utf-8")
+        return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+    @classmethod
+    def decode_cursor(cls, cursor: str, query: str, layer: str) -> int:
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+            offset = int(payload["o"])
+        except Exception:
+            raise ValueError("Invalid cursor")
+        if payload.get("s") != cls._cursor_scope(query, layer) or offset < 0:
+            raise ValueError("Cursor does not belong to this query")
+        return offset
+
+    def search(
+        self,
+        query: str,
+        layer: str,
+        limit: int = 10,
+        cursor: Optional[str] = None
+    ) -> Dict:
+        """
+        Search one layer, e.g. 'uthmani' or 't131'
+
+        Quoted parts of the query are phrase queries. Returns a page of hits
+        and a cursor for the next page (None on the last page).
+        """
+        offset = self.decode_cursor(cursor, query, layer) if cursor else 0
+
+        phrases = [tokenize(p) for p in PHRASE.findall(query)]
+        phrases = [p for p in phrases if p]
+        terms = tokenize(PHRASE.sub(" ", query))
+
+        if not terms and not phrases:
+            return {"results": [], "total": 0, "next_cursor": None}
+
+        scores = self.index(layer).search(terms, phrases)
+        ranked = heapq.nsmallest(offset + limit, scores.items(), key=lambda hit: (-hit[1], hit[0]))
+        page = ranked[offset:]
+
+        results = []
+        for doc, score in page:
+            surah, ayah = self._keys[doc]
+            result = {
+                "verse_key": f"{surah}:{ayah}",
+                "surah_number": surah,
+                "ayah_number": ayah,
+                "arabic_text": self.store.text_at(UTHMANI_LAYER, doc),
+                "score": round(score, 4)
+            }
+            if layer != UTHMANI_LAYER:
+                result["translation"] = self.store.text_at(layer, doc)
+            results.append(result)
+
+        next_offset = offset + len(page)
+        return {
+            "results": results,
+            "total": len(scores),
+            "next_cursor": self.encode_cursor(query, layer, next_offset) if next_offset < len(scores) else None
+        }
+
+@lru_cache()
+def get_search_engine() -> Optional[QuranSearchEngine]:
+    """Search engine over the local corpus, or None if it was never imported"""
+    store = get_quran_store()
+    return QuranSearchEngine(store) if store else None
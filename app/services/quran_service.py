@@ -1,23 +1,56 @@
-import httpx
 from app.config import settings
+from app.services.http_clients import upstream_clients
+from app.services.quran_store import QuranStore, UTHMANI_LAYER, get_quran_store
+from app.services.quran_search import get_search_engine
+from app.utils.single_flight import single_flight
+import asyncio
 import logging
-from typing import Dict, Optional, List
+from typing import Dict, Optional
 
 logger = logging.getLogger(__name__)
 
+# Translation ID per language
+TRANSLATION_IDS = {
+    "en": 131,  # Sahih International
+    "ur": 97,   # Abul A'ala Maududi
+    "hi": 122,  # Hindi
+    "ar": 0,    # Arabic (original)
+    "bn": 161   # Bengali
+}
+
 class QuranService:
     def __init__(self):
         self.base_url = settings.QURAN_API_URL
-        self.timeout = 10.0
+    
+    @property
+    def client(self):
+        """Shared pooled client for the quran upstream"""
+        return upstream_clients.get("quran")
+    
+    @property
+    def store(self) -> Optional[QuranStore]:
+        """Local corpus if imported, the remote API is only a fallback"""
+        return get_quran_store()
+    
+    async def _get_json(self, path: str, params: Optional[Dict] = None) -> Dict:
+        """GET a JSON document, sharing one request among identical concurrent calls"""
+        async def fetch():
+            response = await self.client.get(f"{self.base_url}{path}", params=params)
+            response.raise_for_status()
+            return response.json()
+        
+        key = ("quran-api", path, tuple(sorted((params or {}).items())))
+        return await single_flight.do(key, fetch)
     
     async def get_surah_info(self, surah_number: int) -> Optional[Dict]:
         """Get Surah basic information"""
+        store = self.store
+        if store:
+            return store.chapters.get(surah_number)
+        
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(f"{self.base_url}/chapters/{surah_number}")
-                response.raise_for_status()
-                data = response.json()
-                return data.get("chapter")
+            data = await self._get_json(f"/chapters/{surah_number}")
+            return data.get("chapter")
         except Exception as e:
             logger.error(f"Error fetching Surah info: {str(e)}")
             return None
@@ -29,40 +62,33 @@ class QuranService:
         translation_id: int = 131  # 131 = Sahih International (English)
     ) -> Optional[Dict]:
         """Get specific verse with translation"""
+        store = self.store
+        if store and store.has_translation(translation_id):
+            return store.get_verse(surah_number, ayah_number, translation_id)
+        
         try:
             verse_key = f"{surah_number}:{ayah_number}"
             
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                # Get Arabic text
-                arabic_response = await client.get(
-                    f"{self.base_url}/verses/by_key/{verse_key}",
-                    params={"fields": "text_uthmani"}
-                )
-                arabic_response.raise_for_status()
-                arabic_data = arabic_response.json()
-                
-                # Get translation
-                translation_response = await client.get(
-                    f"{self.base_url}/verses/by_key/{verse_key}",
-                    params={
-                        "translations": translation_id,
-                        "fields": "text_uthmani"
-                    }
-                )
-                translation_response.raise_for_status()
-                translation_data = translation_response.json()
-                
-                verse = arabic_data.get("verse", {})
-                translations = translation_data.get("verse", {}).get("translations", [])
-                
-                return {
-                    "verse_key": verse_key,
-                    "arabic_text": verse.get("text_uthmani", ""),
-                    "translation": translations[0].get("text", "") if translations else "",
-                    "surah_number": surah_number,
-                    "ayah_number": ayah_number
+            # One request returns both the Uthmani text and the translation
+            data = await self._get_json(
+                f"/verses/by_key/{verse_key}",
+                params={
+                    "translations": translation_id,
+                    "fields": "text_uthmani"
                 }
-                
+            )
+            
+            verse = data.get("verse", {})
+            translations = verse.get("translations", [])
+            
+            return {
+                "verse_key": verse_key,
+                "arabic_text": verse.get("text_uthmani", ""),
+                "translation": translations[0].get("text", "") if translations else "",
+                "surah_number": surah_number,
+                "ayah_number": ayah_number
+            }
+            
         except Exception as e:
             logger.error(f"Error fetching verse: {str(e)}")
             return None
@@ -73,60 +99,77 @@ class QuranService:
         translation_id: int = 131
     ) -> Optional[Dict]:
         """Get full Surah with translation"""
+        store = self.store
+        if store and store.has_translation(translation_id):
+            return store.get_full_surah(surah_number, translation_id)
+        
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.base_url}/verses/by_chapter/{surah_number}",
-                    params={
-                        "translations": translation_id,
-                        "fields": "text_uthmani"
-                    }
-                )
-                response.raise_for_status()
-                data = response.json()
-                
-                verses = data.get("verses", [])
-                
-                return {
-                    "surah_number": surah_number,
-                    "verses": [
-                        {
-                            "ayah_number": v.get("verse_number"),
-                            "arabic_text": v.get("text_uthmani", ""),
-                            "translation": v.get("translations", [{}])[0].get("text", "")
-                        }
-                        for v in verses
-                    ]
+            data = await self._get_json(
+                f"/verses/by_chapter/{surah_number}",
+                params={
+                    "translations": translation_id,
+                    "fields": "text_uthmani"
                 }
-                
+            )
+            
+            verses = data.get("verses", [])
+            
+            return {
+                "surah_number": surah_number,
+                "verses": [
+                    {
+                        "ayah_number": v.get("verse_number"),
+                        "arabic_text": v.get("text_uthmani", ""),
+                        "translation": v.get("translations", [{}])[0].get("text", "")
+                    }
+                    for v in verses
+                ]
+            }
+            
         except Exception as e:
             logger.error(f"Error fetching full Surah: {str(e)}")
             return None
     
     def get_translation_id(self, language: str) -> int:
         """Get translation ID based on language"""
-        translation_map = {
-            "en": 131,  # Sahih International
-            "ur": 97,   # Abul A'ala Maududi
-            "hi": 122,  # Hindi
-            "ar": 0,    # Arabic (original)
-            "bn": 161   # Bengali
-        }
-        return translation_map.get(language, 131)
+        return TRANSLATION_IDS.get(language, 131)
     
-    async def search_quran(self, query: str, language: str = "en") -> Optional[List[Dict]]:
-        """Search Quran by text"""
+    async def search_quran(
+        self,
+        query: str,
+        language: str = "en",
+        limit: int = 10,
+        cursor: Optional[str] = None
+    ) -> Optional[Dict]:
+        """
+        Search Quran by text
+        
+        Served by the local BM25 index over the Arabic text (language 'ar')
+        or the language's translation. Raises ValueError for a bad cursor.
+        """
+        engine = get_search_engine()
+        translation_id = self.get_translation_id(language)
+        layer = QuranStore.layer_name(translation_id) if translation_id else UTHMANI_LAYER
+        
+        if engine and engine.store.has_layer(layer):
+            # Off the loop: the first query may also build the index
+            return await asyncio.to_thread(engine.search, query, layer, limit=limit, cursor=cursor)
+        
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.base_url}/search",
-                    params={"q": query, "size": 10}
-                )
-                response.raise_for_status()
-                data = response.json()
-                
-                return data.get("search", {}).get("results", [])
-                
+            client = self.client
+            response = await client.get(
+                f"{self.base_url}/search",
+                params={"q": query, "size": limit, "language": language}
+            )
+            response.raise_for_status()
+            data = response.json()
+            
+            return {
+                "results": data.get("search", {}).get("results", []),
+                "total": data.get("search", {}).get("total_results"),
+                "next_cursor": None
+            }
+            
         except Exception as e:
             logger.error(f"Error searching Quran: {str(e)}")
-            return None
\ No newline at end of file
+            return None
@@ -0,0 +1,202 @@
+from app.config import settings
+from array import array
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+import asyncio
+import json
+import logging
+import mmap
+import os
+
+logger = logging.getLogger(__name__)
+
+TOTAL_AYAHS = 6236
+UTHMANI_LAYER = "uthmani"
+
+class QuranStore:
+    """
+    Read-only local Quran corpus
+
+    Each text layer (the Uthmani script and one per translation) is stored
+    as two files: ``<layer>.txt``, all ayahs concatenated as UTF-8, and
+    ``<layer>.idx``, 6237 uint32 byte offsets into it. Both are memory-mapped,
+    so a verse lookup is two offset reads and one slice decode.
+    """
+
+    def __init__(self, data_dir: Path):
+        self.data_dir = Path(data_dir)
+
+        with open(self.data_dir / "chapters.json", encoding="utf-8") as f:
+            chapters = json.load(f)
+
+        self.chapters: Dict[int, Dict] = {c["id"]: c for c in chapters}
+
+        # Global ayah index of the first verse of each surah
+        self._surah_start = [0] * 116
+        for number in range(1, 115):
+            self._surah_start[number + 1] = self._surah_start[number] + self.chapters[number]["verses_count"]
+
+        self._layers: Dict[str, tuple] = {}
+
+    @staticmethod
+    def layer_name(translation_id: int) -> str:
+        return f"t{translation_id}"
+
+    def layers(self) -> List[str]:
+        """Names of all imported text layers"""
+        return sorted(path.stem for path in self.data_dir.glob("*.idx"))
+
+    def has_layer(self, layer: str) -> bool:
+        return layer in self._layers or (self.data_dir / f"{layer}.idx").exists()
+
+    def has_translation(self, translation_id: int) -> bool:
+        """0 means Arabic only, which needs no translation layer"""
+        return translation_id == 0 or self.has_layer(self.layer_name(translation_id))
+
+    def _layer(self, layer: str):
+        if layer not in self._layers:
+            with open(self.data_dir / f"{layer}.txt", "rb") as f:
+                text = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            with open(self.data_dir / f"{layer}.idx", "rb") as f:
+                offsets = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)).cast("I")
+            self._layers[layer] = (text, offsets)
+        return self._layers[layer]
+
+    def verse_count(self, surah_number: int) -> int:
+        chapter = self.chapters.get(surah_number)
+        return chapter["verses_count"] if chapter else 0
+
+    def ayah_index(self, surah_number: int, ayah_number: int) -> Optional[int]:
+        """Global 0-based position of an ayah, or None if it does not exist"""
+        if not 1 <= ayah_number <= self.verse_count(surah_number):
+            return None
+        return self._surah_start[surah_number] + ayah_number - 1
+
+    def text_at(self, layer: str, index: int) -> str:
+        text, offsets = self._layer(layer)
+        return text[offsets[index]:offsets[index + 1]].decode("utf-8")
+
+    def get_text(self, layer: str, surah_number: int, ayah_number: int) -> Optional[str]:
+        index = self.ayah_index(surah_number, ayah_number)
+        return None if index is None else self.text_at(layer, index)
+
+    def get_verse(self, surah_number: int, ayah_number: int, translation_id: int) -> Optional[Dict]:
+        """Same shape as QuranService.get_verse"""
+        index = self.ayah_index(surah_number, ayah_number)
+        if index is None:
+            return None
+
+        return {
+            "verse_key": f"{surah_number}:{ayah_number}",
+            "arabic_text": self.text_at(UTHMANI_LAYER, index),
+            "translation": self.text_at(self.layer_name(translation_id), index) if translation_id else "",
+            "surah_number": surah_number,
+            "ayah_number": ayah_number
+        }
+
+    def get_full_surah(self, surah_number: int, translation_id: int) -> Optional[Dict]:
+        """Same shape as QuranService.get_full_surah"""
+        if surah_number not in self.chapters:
+            return None
+
+        return {
+            "surah_number": surah_number,
+            "verses": [
+                {
+                    "ayah_number": verse["ayah_number"],
+                    "arabic_text": verse["arabic_text"],
+                    "translation": verse["translation"]
+                }
+                for verse in (
+                    self.get_verse(surah_number, ayah, translation_id)
+                    for ayah in range(1, self.verse_count(surah_number) + 1)
+                )
+            ]
+        }
+
+@lru_cache()
+def get_quran_store() -> Optional[QuranStore]:
+    """
+    Load the local corpus from QURAN_DATA_DIR, or None if it was never imported
+
+    The result is cached for the life of the process, restart after an import.
+    """
+    data_dir = Path(settings.QURAN_DATA_DIR)
+    if not (data_dir / "chapters.json").exists() or not (data_dir / f"{UTHMANI_LAYER}.idx").exists():
+        logger.info(f"No local Quran corpus in {data_dir}, using remote API")
+        return None
+
+    try:
+        return QuranStore(data_dir)
+    except Exception as e:
+        logger.error(f"Error loading local Quran corpus: {str(e)}")
+        return None
+
+def _write_layer(data_dir: Path, layer: str, texts: List[str]):
+    """Write a text blob and its offset array, replacing any previous copy atomically"""
+    if len(texts) != TOTAL_AYAHS:
+        raise ValueError(f"Layer {layer} has {len(texts)} ayahs, expected {TOTAL_AYAHS}")
+
+    blob = bytearray()
+    offsets = array("I", [0])
+    for text in texts:
+        blob += text.encode("utf-8")
+        offsets.append(len(blob))
+
+    for suffix, data in ((".txt", bytes(blob)), (".idx", offsets.tobytes())):
+        tmp = data_dir / f"{layer}{suffix}.tmp"
+        tmp.write_bytes(data)
+        os.replace(tmp, data_dir / f"{layer}{suffix}")
+
+async def import_corpus(data_dir: Path, translation_ids: Iterable[int]):
+    """Download chapters, the Uthmani text and translations into data_dir"""
+    from app.services.http_clients import upstream_clients
+
+    client = upstream_clients.get("quran")
+    base_url = settings.QURAN_API_URL
+    data_dir.mkdir(parents=True, exist_ok=True)
+
+    try:
+        response = await client.get(f"{base_url}/chapters")
+        response.raise_for_status()
+        chapters = response.json()["chapters"]
+
+        response = await client.get(f"{base_url}/quran/verses/uthmani")
+        response.raise_for_status()
+        verses = response.json()["verses"]
+        _write_layer(data_dir, UTHMANI_LAYER, [v["text_uthmani"] for v in verses])
+        logger.info(f"Imported Uthmani text ({len(verses)} ayahs)")
+
+        for translation_id in translation_ids:
+            response = await client.get(f"{base_url}/quran/translations/{translation_id}")
+            response.raise_for_status()
+            translations = response.json()["translations"]
+            _write_layer(data_dir, QuranStore.layer_name(translation_id), [t["text"] for t in translations])
+            logger.info(f"Imported translation {translation_id}")
+
+        # Written last, so a partial import is never picked up as a corpus
+        tmp = data_dir / "chapters.json.tmp"
+        tmp.write_text(json.dumps(chapters, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, data_dir / "chapters.json")
+    finally:
+        await upstream_clients.shutdown()
+
+def main():
+    import argparse
+    from app.services.quran_service import TRANSLATION_IDS
+
+    default_ids = sorted({tid for tid in TRANSLATION_IDS.values() if tid})
+
+    parser = argparse.ArgumentParser(description="Import the Quran corpus for offline serving")
+    parser.add_argument("command", choices=["import"])
+    parser.add_argument("--data-dir", default=settings.QURAN_DATA_DIR)
+    parser.add_argument("--translations", type=int, nargs="*", default=default_ids,
+                        help=f"Translation IDs to import (default: {default_ids})")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    asyncio.run(import_corpus(Path(args.data_dir), args.translations))
+
+if __name__ == "__main__":
+    main()
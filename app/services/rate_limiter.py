@@ -0,0 +1,250 @@
+from app.config import settings
+from datetime import datetime, timedelta, timezone
+from typing import Dict, NamedTuple, Tuple
+import hashlib
+import logging
+import math
+import time
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # Optional, only needed for RATE_LIMIT_BACKEND=redis
+    redis_asyncio = None
+
+logger = logging.getLogger(__name__)
+
+class RateLimitDecision(NamedTuple):
+    allowed: bool
+    limit: int            # Bucket capacity (requests per minute)
+    remaining: int        # Whole tokens left in the bucket
+    reset: int            # Seconds until the bucket is full again
+    retry_after: int      # Seconds to wait when not allowed
+    quota_limit: int      # Requests per UTC day
+    quota_remaining: int
+    quota_reset: int      # Seconds until the daily quota resets
+
+class MemoryRateLimitBackend:
+    """
+    Token buckets and daily counters in process memory
+
+    hit() never awaits, so each check-and-consume runs atomically on the
+    event loop without locks. Limits are per worker process.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_buckets: int = 100_000):
+        self.max_buckets = max_buckets
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._quotas: Dict[str, int] = {}
+        self._quota_day = None
+        self._pruned_at = 0.0
+
+    def _prune(self, now: float, capacity: float, rate: float):
+        # Buckets that have refilled completely are the same as new ones
+        self._buckets = {
+            key: (tokens, updated)
+            for key, (tokens, updated) in self._buckets.items()
+            if tokens + (now - updated) * rate < capacity
+        }
+
+    async def hit(
+        self,
+        bucket_key: str,
+        capacity: float,
+        rate: float,
+        quota_key: str,
+        quota_day: str,
+        quota_limit: int,
+        quota_ttl: int,
+        now: float
+    ) -> Tuple[bool, float, float, int]:
+        """(allowed, tokens left, retry after seconds, quota used)"""
+        if quota_day != self._quota_day:
+            self._quotas = {}
+            self._quota_day = quota_day
+
+        tokens, updated = self._buckets.get(bucket_key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * rate)
+        used = self._quotas.get(quota_key, 0)
+
+        if used >= quota_limit:
+            return False, tokens, quota_ttl, used
+
+        if tokens < 1:
+            self._buckets[bucket_key] = (tokens, now)
+            return False, tokens, (1 - tokens) / rate, used
+
+        if len(self._buckets) >= self.max_buckets and now - self._pruned_at > 10:
+            self._pruned_at = now
+            self._prune(now, capacity, rate)
+
+        self._buckets[bucket_key] = (tokens - 1, now)
+        self._quotas[quota_key] = used + 1
+        return True, tokens - 1, 0.0, used + 1
+
+    async def close(self):
+        pass
+
+# Same algorithm as the memory backend, run atomically inside Redis.
+# Floats are returned as strings because Redis truncates Lua numbers.
+_REDIS_HIT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local quota_limit = tonumber(ARGV[3])
+local quota_ttl = tonumber(ARGV[4])
+local now = tonumber(ARGV[5])
+local bucket_ttl = math.ceil(capacity / rate) + 1
+
+local used = tonumber(redis.call('GET', KEYS[2]) or '0')
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+
+if used >= quota_limit then
+    return {0, tostring(tokens), tostring(quota_ttl), used}
+end
+
+if tokens < 1 then
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+    redis.call('EXPIRE', KEYS[1], bucket_ttl)
+    return {0, tostring(tokens), tostring((1 - tokens) / rate), used}
+end
+
+tokens = tokens - 1
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], bucket_ttl)
+used = redis.call('INCR', KEYS[2])
+if used == 1 then
+    redis.call('EXPIRE', KEYS[2], quota_ttl)
+end
+return {1, tostring(tokens), '0', used}
+"""
+
+class RedisRateLimitBackend:
+    """
+    Token buckets and daily counters shared by every worker through Redis
+
+    Each check-and-consume is one Lua script call (EVALSHA), so it is a
+    single round trip and atomic across processes.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str):
+        if redis_asyncio is None:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis needs the 'redis' package")
+        self.client = redis_asyncio.from_url(url)
+        self._script = self.client.register_script(_REDIS_HIT)
+
+    async def hit(
+        self,
+        bucket_key: str,
+        capacity: float,
+        rate: float,
+        quota_key: str,
+        quota_day: str,
+        quota_limit: int,
+        quota_ttl: int,
+        now: float
+    ) -> Tuple[bool, float, float, int]:
+        allowed, tokens, retry_after, used = await self._script(
+            keys=[bucket_key, quota_key],
+            args=[capacity, rate, quota_limit, quota_ttl, now]
+        )
+        return bool(allowed), float(tokens), float(retry_after), int(used)
+
+    async def close(self):
+        await self.client.close()
+
+class RateLimiter:
+    """
+    Per-user limits by tier and endpoint
+
+    - Token bucket per (tier, endpoint, user): up to a minute's allowance
+      in a burst, refilled continuously.
+    - Daily quota per user across all metered endpoints, reset at 00:00 UTC.
+
+    Premium callers present one of PREMIUM_API_KEYS; keys are held and
+    matched as SHA-256 digests. If the backend fails, requests are let
+    through and the error is logged.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.premium_keys = {self._digest(key.encode("utf-8")) for key in settings.PREMIUM_API_KEYS}
+        self._stats = {"allowed": 0, "limited": 0, "backend_errors": 0}
+        self._day = ""
+        self._midnight = 0.0
+
+    @staticmethod
+    def _digest(key: bytes) -> str:
+        return hashlib.sha256(key).hexdigest()
+
+    def premium_key_id(self, api_key: bytes):
+        """Stable ID of a valid premium API key, None for unknown keys"""
+        digest = self._digest(api_key)
+        return digest[:16] if digest in self.premium_keys else None
+
+    async def check(self, user: str, endpoint: str, premium: bool = False) -> RateLimitDecision:
+        tier = "premium" if premium else "free"
+        if premium:
+            per_minute = settings.PREMIUM_TIER_PER_MINUTE
+            quota_limit = settings.PREMIUM_TIER_DAILY_LIMIT
+        else:
+            per_minute = settings.FREE_TIER_PER_MINUTE
+            quota_limit = settings.FREE_TIER_DAILY_LIMIT
+
+        now = time.time()
+        if now >= self._midnight:
+            today = datetime.fromtimestamp(now, timezone.utc).date()
+            self._day = today.isoformat()
+            self._midnight = datetime.combine(
+                today + timedelta(days=1), datetime.min.time(), timezone.utc
+            ).timestamp()
+        quota_ttl = max(1, math.ceil(self._midnight - now))
+        rate = per_minute / 60
+
+        try:
+            allowed, tokens, retry_after, used = await self.backend.hit(
+                f"ratelimit:{tier}:{endpoint}:{user}",
+                per_minute,
+                rate,
+                f"quota:{self._day}:{user}",
+                self._day,
+                quota_limit,
+                quota_ttl,
+                now
+            )
+        except Exception as e:
+            self._stats["backend_errors"] += 1
+            logger.error(f"Rate limit backend error: {str(e)}")
+            allowed, tokens, retry_after, used = True, per_minute, 0.0, 0
+
+        self._stats["allowed" if allowed else "limited"] += 1
+
+        return RateLimitDecision(
+            allowed=allowed,
+            limit=per_minute,
+            remaining=max(0, int(tokens)),
+            reset=math.ceil((per_minute - tokens) / rate),
+            retry_after=math.ceil(retry_after),
+            quota_limit=quota_limit,
+            quota_remaining=max(0, quota_limit - used),
+            quota_reset=quota_ttl
+        )
+
+    def stats(self) -> Dict:
+        return {"backend": self.backend.name, **self._stats}
+
+def create_rate_limiter() -> RateLimiter:
+    """Rate limiter on the configured backend, falling back to memory"""
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        try:
+            return RateLimiter(RedisRateLimitBackend(settings.REDIS_URL))
+        except Exception as e:
+            logger.error(f"Redis rate limit backend unavailable, using memory: {str(e)}")
+    return RateLimiter(MemoryRateLimitBackend())
+
+rate_limiter = create_rate_limiter()
@@ -0,0 +1,196 @@
+from app.config import settings
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import logging
+import secrets
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class SessionStore:
+    """
+    Server-side conversation history per (user_id, session_id)
+
+    Turns are appended to SQLite (WAL, one row per turn, never rewritten)
+    and kept in memory while a session is active. Sessions idle for longer
+    than `idle_seconds` are dropped from memory and reloaded from disk on
+    their next message. At most `max_turns` of the newest turns are used,
+    dropped in steps of `trim_step` from fixed positions so the history
+    manager's cached summaries keep matching; it summarizes whatever does
+    not fit the prompt. Sessions without a turn for `retention_days` are
+    deleted by purge_expired().
+
+    The memory tier lives on the event loop; SQLite reads and writes run
+    in a worker thread.
+    """
+
+    def __init__(self, path: str, idle_seconds: int, max_turns: int, block_turns: int, retention_days: int):
+        self.path = Path(path)
+        self.idle_seconds = idle_seconds
+        self.retention_days = retention_days
+        self.max_turns = max_turns
+        # Half the window at a time, in whole summary blocks
+        self.trim_step = max(block_turns, (max_turns // 2) // block_turns * block_turns)
+
+        self._hot: Dict[str, Tuple[List[Dict], float]] = {}
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+        self._stats = {"hot_hits": 0, "loads": 0, "evictions": 0, "turns_written": 0}
+
+    @staticmethod
+    def new_session_id() -> str:
+        return secrets.token_urlsafe(12)
+
+    @staticmethod
+    def _key(user_id: Optional[str], session_id: str) -> str:
+        return f"{user_id or ''}:{session_id}"
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        with self._db_lock:
+            if self._db is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute("PRAGMA synchronous=NORMAL")
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS turns ("
+                    "session TEXT NOT NULL, seq INTEGER NOT NULL, role TEXT NOT NULL, "
+                    "content TEXT NOT NULL, created_at REAL NOT NULL, "
+                    "PRIMARY KEY (session, seq)) WITHOUT ROWID"
+                )
+                self._db = db
+            return self._db
+
+    def _first_seq(self, last_seq: int) -> int:
+        """Oldest turn in use: a multiple of trim_step, leaving at most max_turns"""
+        excess = last_seq + 1 - self.max_turns
+        return max(0, -(-excess // self.trim_step) * self.trim_step)
+
+    def _sweep(self, now: float):
+        if now - self._last_sweep < 60:
+            return
+        self._last_sweep = now
+        idle = [key for key, (_, used) in self._hot.items() if now - used > self.idle_seconds]
+        for key in idle:
+            del self._hot[key]
+        self._stats["evictions"] += len(idle)
+
+    def _load(self, key: str) -> List[Dict]:
+        """Turns in use of a session, from disk"""
+        try:
+            last_seq = self.db.execute(
+                "SELECT MAX(seq) FROM turns WHERE session = ?", (key,)
+            ).fetchone()[0]
+            rows = [] if last_seq is None else self.db.execute(
+                "SELECT seq, role, content FROM turns WHERE session = ? AND seq >= ? ORDER BY seq",
+                (key, self._first_seq(last_seq))
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Session load failed: {str(e)}")
+            rows = []
+        return [{"seq": seq, "role": role, "content": content} for seq, role, content in rows]
+
+    def _write(self, key: str, turns: List[Dict]):
+        now = time.time()
+        try:
+            self.db.executemany(
+                "INSERT INTO turns (session, seq, role, content, created_at) VALUES (?, ?, ?, ?, ?)",
+                [(key, turn["seq"], turn["role"], turn["content"], now) for turn in turns]
+            )
+            self._stats["turns_written"] += len(turns)
+        except sqlite3.Error as e:
+            logger.error(f"Session write failed: {str(e)}")
+
+    async def _turns(self, key: str) -> List[Dict]:
+        now = time.monotonic()
+        self._sweep(now)
+
+        entry = self._hot.get(key)
+        if entry is not None:
+            self._stats["hot_hits"] += 1
+            turns = entry[0]
+        else:
+            self._stats["loads"] += 1
+            turns = await asyncio.to_thread(self._load, key)
+            # A concurrent request may have loaded it meanwhile
+            entry = self._hot.get(key)
+            if entry is not None:
+                turns = entry[0]
+
+        self._hot[key] = (turns, now)
+        return turns
+
+    async def history(self, user_id: Optional[str], session_id: str) -> List[Dict]:
+        """Turns of a session, oldest first, as chat messages"""
+        return [
+            {"role": turn["role"], "content": turn["content"]}
+            for turn in await self._turns(self._key(user_id, session_id))
+        ]
+
+    async def append(self, user_id: Optional[str], session_id: str, *messages: Tuple[str, str]):
+        """Append (role, content) turns to a session in one write"""
+        key = self._key(user_id, session_id)
+        turns = await self._turns(key)
+
+        # Sequence numbers are taken on the loop, so concurrent appends never collide
+        seq = turns[-1]["seq"] + 1 if turns else 0
+        new = [
+            {"seq": seq + i, "role": role, "content": content}
+            for i, (role, content) in enumerate(messages)
+        ]
+        turns.extend(new)
+        first_seq = self._first_seq(turns[-1]["seq"])
+        if turns[0]["seq"] < first_seq:
+            del turns[:first_seq - turns[0]["seq"]]
+
+        await asyncio.to_thread(self._write, key, new)
+
+    async def open(self, user_id: Optional[str], session_id: Optional[str]) -> Tuple[str, List[Dict]]:
+        """(session_id, history) of a session, starting a new one if no ID is given"""
+        if not session_id:
+            return self.new_session_id(), []
+        return session_id, await self.history(user_id, session_id)
+
+    async def record(self, user_id: Optional[str], session_id: str, message: str, reply: str):
+        """Append one exchange to a session"""
+        await self.append(user_id, session_id, ("user", message), ("assistant", reply))
+
+    def purge_expired(self) -> int:
+        """Delete sessions whose last turn is older than retention_days; 0 keeps them all"""
+        if self.retention_days <= 0:
+            return 0
+        cutoff = time.time() - self.retention_days * 86400
+        try:
+            expired = [row[0] for row in self.db.execute(
+                "SELECT session FROM turns GROUP BY session HAVING MAX(created_at) < ?", (cutoff,)
+            )]
+            self.db.executemany("DELETE FROM turns WHERE session = ?", [(key,) for key in expired])
+        except sqlite3.Error as e:
+            logger.warning(f"Session purge failed: {str(e)}")
+            return 0
+        for key in expired:
+            self._hot.pop(key, None)
+        if expired:
+            logger.info(f"Purged {len(expired)} expired chat sessions")
+        return len(expired)
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def stats(self) -> Dict:
+        return {**self._stats, "hot_sessions": len(self._hot)}
+
+session_store = SessionStore(
+    settings.SESSION_DB_PATH,
+    settings.SESSION_IDLE_SECONDS,
+    settings.SESSION_MAX_TURNS,
+    settings.HISTORY_SUMMARY_BLOCK_TURNS,
+    settings.SESSION_RETENTION_DAYS
+)
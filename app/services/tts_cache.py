@@ -0,0 +1,172 @@
+from app.config import settings
+from collections import OrderedDict
+from pathlib import Path
+from typing import AsyncGenerator, AsyncIterator, Dict, Optional
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import secrets
+import unicodedata
+
+logger = logging.getLogger(__name__)
+
+class TTSCache:
+    """
+    Disk cache of synthesized MP3 audio
+
+    Keys hash the normalized text with everything that changes the audio:
+    voice, voice settings (speed, stability, style, ...), model, language
+    and output format. Files live at ``<dir>/<key[:2]>/<key>.mp3``. Total
+    size is capped, evicting least recently used files; recency is kept in
+    the file mtime so it survives restarts.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._bytes = 0
+        self._loaded = False
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "bytes_saved": 0,
+            "evictions": 0
+        }
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+    def key(
+        self,
+        text: str,
+        voice_id: str,
+        voice_settings: Dict,
+        model: str,
+        language: str,
+        output_format: str
+    ) -> str:
+        payload = json.dumps(
+            [self.normalize(text), voice_id, voice_settings, model, str(language), output_format],
+            ensure_ascii=False,
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.mp3"
+
+    def load(self):
+        """Rebuild the LRU index from the files on disk, oldest first"""
+        if self._loaded:
+            return
+        found = []
+        for path in self.cache_dir.glob("*/*.mp3"):
+            try:
+                stat = path.stat()
+                found.append((stat.st_mtime, path.stem, stat.st_size))
+            except FileNotFoundError:
+                pass
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._bytes += size
+        self._loaded = True
+        self._evict()
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._bytes -= size
+            self._stats["evictions"] += 1
+            try:
+                self._path(key).unlink()
+            except FileNotFoundError:
+                pass
+
+    def lookup(self, key: str) -> Optional[Path]:
+        """Path of the cached audio, counted as a hit; None if not cached"""
+        self.load()
+        size = self._entries.get(key)
+        if size is None:
+            return None
+
+        path = self._path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self._bytes -= self._entries.pop(key)
+            return None
+
+        self._entries.move_to_end(key)
+        self._stats["hits"] += 1
+        self._stats["bytes_saved"] += size
+        return path
+
+    def record_miss(self):
+        self._stats["misses"] += 1
+
+    async def read(self, path: Path, chunk_size: int) -> AsyncIterator[bytes]:
+        handle = await asyncio.to_thread(open, path, "rb")
+        try:
+            while True:
+                chunk = await asyncio.to_thread(handle.read, chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            handle.close()
+
+    async def store(self, key: str, chunks: AsyncGenerator[bytes, None]) -> AsyncIterator[bytes]:
+        """
+        Pass chunks through while writing them to the cache
+
+        The file is only added once the stream completes; a failed or
+        abandoned stream leaves nothing behind.
+        """
+        path = self._path(key)
+        tmp = path.with_name(f"{key}.{secrets.token_hex(4)}.tmp")
+        await asyncio.to_thread(path.parent.mkdir, parents=True, exist_ok=True)
+
+        handle = await asyncio.to_thread(open, tmp, "wb")
+        size = 0
+        try:
+            async for chunk in chunks:
+                await asyncio.to_thread(handle.write, chunk)
+                size += len(chunk)
+                yield chunk
+            handle.close()
+            if size == 0:
+                tmp.unlink(missing_ok=True)
+                return
+            os.replace(tmp, path)
+        except BaseException:
+            handle.close()
+            tmp.unlink(missing_ok=True)
+            raise
+        finally:
+            # Release the upstream request right away if the consumer stops early
+            await chunks.aclose()
+
+        self.load()
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)
+        self._entries[key] = size
+        self._bytes += size
+        self._evict()
+
+    def stats(self) -> Dict:
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "hit_ratio": round(self._stats["hits"] / lookups, 4) if lookups else None,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes
+        }
+
+tts_cache = TTSCache(settings.TTS_CACHE_DIR, settings.TTS_CACHE_MAX_BYTES)
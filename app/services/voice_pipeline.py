@@ -0,0 +1,129 @@
+from app.config import settings
+from app.services.elevenlabs_service import ElevenLabsService
+from app.services.openai_service import OpenAIService
+from app.utils.sentences import SentenceSplitter
+from typing import AsyncIterator, Dict, List, Optional
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+class _Segment:
+    """One sentence being synthesized; its queue carries chunks, then None or an exception"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.queue: asyncio.Queue = asyncio.Queue()
+
+class VoicePipeline:
+    """
+    Speaks a Murshid reply while it is still being written
+
+    The LLM reply is streamed and cut into sentences. Each sentence starts
+    its TTS request as soon as it is complete, while later sentences are
+    still being generated. Audio is delivered strictly in sentence order:
+    the current sentence streams live and the ones after it buffer. At most
+    `lookahead` sentences are synthesized or buffered at once.
+    """
+
+    def __init__(
+        self,
+        openai_service: OpenAIService,
+        elevenlabs_service: ElevenLabsService,
+        lookahead: int = settings.VOICE_PIPELINE_LOOKAHEAD
+    ):
+        self.openai_service = openai_service
+        self.elevenlabs_service = elevenlabs_service
+        self.lookahead = lookahead
+
+    async def stream(
+        self,
+        message: str,
+        language: str = "en",
+        voice_style: str = "calm",
+        speed: float = 0.85,
+        conversation_history: Optional[List[Dict]] = None
+    ) -> AsyncIterator[Dict]:
+        """
+        Yield events in order:
+
+        - {"type": "sentence", "text": ...} before each sentence's audio
+        - {"type": "audio", "data": ...} MP3 chunks
+        - {"type": "done", "tokens_used": ..., "ttft_ms": ..., "text": ...} at the end
+
+        LLM and TTS errors are raised. Closing the iterator cancels the LLM
+        stream and every pending synthesis.
+        """
+        segments: asyncio.Queue = asyncio.Queue()
+        slots = asyncio.Semaphore(self.lookahead)
+        tasks: List[asyncio.Task] = []
+        summary: Dict = {}
+
+        async def synthesize(segment: _Segment):
+            try:
+                async for chunk in self.elevenlabs_service.stream_speech(
+                    segment.text, voice_style, language, speed
+                ):
+                    segment.queue.put_nowait(chunk)
+                segment.queue.put_nowait(None)
+            except Exception as e:
+                segment.queue.put_nowait(e)
+
+        async def start(sentence: str):
+            # Released by the consumer once the sentence has been delivered
+            await slots.acquire()
+            segment = _Segment(sentence)
+            tasks.append(asyncio.create_task(synthesize(segment)))
+            segments.put_nowait(segment)
+
+        async def produce():
+            splitter = SentenceSplitter()
+            reply = []
+            try:
+                async for event in self.openai_service.stream_chat_with_murshid(
+                    message=message,
+                    language=language,
+                    conversation_history=conversation_history
+                ):
+                    if event["type"] == "token":
+                        reply.append(event["content"])
+                        for sentence in splitter.feed(event["content"]):
+                            await start(sentence)
+                    else:
+                        summary.update(
+                            tokens_used=event["tokens_used"],
+                            ttft_ms=event["ttft_ms"],
+                            text="".join(reply)
+                        )
+
+                tail = splitter.flush()
+                if tail:
+                    await start(tail)
+                segments.put_nowait(None)
+            except Exception as e:
+                segments.put_nowait(e)
+
+        producer = asyncio.create_task(produce())
+        try:
+            while True:
+                segment = await segments.get()
+                if segment is None:
+                    break
+                if isinstance(segment, Exception):
+                    raise segment
+
+                yield {"type": "sentence", "text": segment.text}
+                while True:
+                    item = await segment.queue.get()
+                    if item is None:
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    yield {"type": "audio", "data": item}
+                slots.release()
+
+            yield {"type": "done", **summary}
+        finally:
+            producer.cancel()
+            for task in tasks:
+                task.cancel()
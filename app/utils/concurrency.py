@@ -0,0 +1,69 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+
+class ConcurrencyLimiter:
+    """
+    Bounds in-flight calls globally and per key (e.g. per endpoint)
+
+    A call holds its key's slot first and then a global slot, so a burst on
+    one endpoint can never take every global slot away from the others.
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        key_limits: Optional[Dict[str, int]] = None,
+        default_key_limit: Optional[int] = None
+    ):
+        self.limit = limit
+        self.key_limits = dict(key_limits or {})
+        self.default_key_limit = default_key_limit or limit
+        self._global = asyncio.Semaphore(limit)
+        self._keys: Dict[str, asyncio.Semaphore] = {}
+        self._in_flight: Dict[str, int] = {}
+        self._waiting: Dict[str, int] = {}
+        self._peak = 0
+
+    def _semaphore(self, key: str) -> asyncio.Semaphore:
+        semaphore = self._keys.get(key)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.key_limits.get(key, self.default_key_limit))
+            self._keys[key] = semaphore
+        return semaphore
+
+    @asynccontextmanager
+    async def acquire(self, key: str = "default"):
+        """Wait for a slot for `key`, hold it for the duration of the block"""
+        self._waiting[key] = self._waiting.get(key, 0) + 1
+        acquired = False
+        try:
+            async with self._semaphore(key), self._global:
+                self._waiting[key] -= 1
+                acquired = True
+                self._in_flight[key] = self._in_flight.get(key, 0) + 1
+                self._peak = max(self._peak, sum(self._in_flight.values()))
+                try:
+                    yield
+                finally:
+                    self._in_flight[key] -= 1
+        finally:
+            if not acquired:
+                self._waiting[key] -= 1
+
+    def stats(self) -> Dict:
+        """Current in-flight and waiting counts per key"""
+        return {
+            "limit": self.limit,
+            "in_flight": sum(self._in_flight.values()),
+            "peak_in_flight": self._peak,
+            "keys": {
+                key: {
+                    "limit": self.key_limits.get(key, self.default_key_limit),
+                    "in_flight": self._in_flight.get(key, 0),
+                    "waiting": self._waiting.get(key, 0)
+                }
+                for key in self._keys
+            }
+        }
@@ -129,4 +129,18 @@ Requirements:
 4. Uplifting and encouraging
 5. Include a relevant reference if possible
 
-Make it concise, powerful, and memorable."""
\ No newline at end of file
+Make it concise, powerful, and memorable."""
+    @staticmethod
+    def get_history_summary_prompt(summary: str, transcript: str) -> str:
+        """Prompt to fold earlier turns into the running conversation summary"""
+        previous = f"Summary so far:\n{summary}\n\n" if summary else ""
+        return f"""{previous}Further conversation between the seeker and Al Murshid:
+{transcript}
+
+Update the summary of this conversation for Al Murshid to continue it:
+1. Keep the seeker's situation, questions and feelings
+2. Keep the guidance, practices and references already given
+3. Leave out greetings and repetition
+4. At most one short paragraph
+
+Reply with the summary only."""
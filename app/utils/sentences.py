@@ -0,0 +1,53 @@
+from typing import List, Optional
+import re
+
+# Sentence-ending punctuation: Latin, Arabic question mark, Urdu full stop,
+# Devanagari/Bengali danda. Closing quotes stay with their sentence, and a
+# terminator only counts once the following whitespace has arrived, so
+# "3." is not cut before "14" streams in.
+_BOUNDARY = re.compile(r"[.!?…؟۔।॥]+[\"'”’»)\]]*(?=\s)|\n+")
+
+
+class SentenceSplitter:
+    """
+    Cuts streamed text into sentences as it arrives
+
+    Sentences shorter than min_chars are merged into the next one to avoid
+    tiny TTS requests. Text running past max_chars without punctuation is
+    cut at the last space.
+    """
+
+    def __init__(self, min_chars: int = 24, max_chars: int = 300):
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self._buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        """Add text, return the sentences it completed"""
+        self._buffer += text
+        sentences = []
+        start = 0
+
+        for match in _BOUNDARY.finditer(self._buffer):
+            sentence = self._buffer[start:match.end()].strip()
+            if len(sentence) < self.min_chars:
+                continue
+            sentences.append(sentence)
+            start = match.end()
+
+        rest = self._buffer[start:]
+        while len(rest) > self.max_chars:
+            cut = rest.rfind(" ", 0, self.max_chars)
+            if cut <= 0:
+                cut = self.max_chars
+            sentences.append(rest[:cut].strip())
+            rest = rest[cut:]
+
+        self._buffer = rest
+        return [s for s in sentences if s]
+
+    def flush(self) -> Optional[str]:
+        """Whatever is left once the stream has ended"""
+        rest = self._buffer.strip()
+        self._buffer = ""
+        return rest or None
@@ -0,0 +1,69 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls onto one in-flight task
+
+    Keys are tuples whose first element names the kind of call, e.g.
+    ("quran-verse", "2:255", 131); counters are kept per kind.
+
+    The work runs in its own task, so one caller being cancelled does not
+    cancel it for the others. It is cancelled only when every waiter has
+    gone. Results and exceptions are delivered to all waiters.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Tuple, _Call] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _forget(self, key: Tuple, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def _finished(self, key: Tuple, call: _Call, task: asyncio.Task):
+        self._forget(key, call)
+        # Mark the exception as retrieved even if every waiter has left
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, key: Tuple, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn(), or join the identical call already in flight"""
+        stats = self._stats.setdefault(key[0], {"calls": 0, "coalesced": 0})
+
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda task, call=call: self._finished(key, call, task))
+            stats["calls"] += 1
+        else:
+            stats["coalesced"] += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Nobody is left to use the result; later callers start afresh
+                self._forget(key, call)
+                call.task.cancel()
+
+    def stats(self) -> Dict:
+        return {
+            "in_flight": len(self._calls),
+            "kinds": self._stats
+        }
+
+
+single_flight = SingleFlight()
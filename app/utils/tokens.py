@@ -0,0 +1,52 @@
+from functools import lru_cache
+from typing import Dict, List
+import logging
+import math
+
+try:
+    import tiktoken
+except ImportError:  # Optional; token counts are estimated without it
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Chat format overhead per message and per reply, as documented by OpenAI
+MESSAGE_OVERHEAD = 4
+REPLY_OVERHEAD = 3
+
+
+@lru_cache(maxsize=8)
+def _encoding(model: str):
+    if tiktoken is None:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # The encoding is downloaded on first use; estimate if that fails
+        logger.warning(f"Token encoding unavailable, estimating counts: {str(e)}")
+        return None
+
+
+def load_encoding(model: str):
+    """Load (and download if needed) the model's encoding ahead of the first request"""
+    _encoding(model)
+
+
+def count_tokens(text: str, model: str) -> int:
+    """Tokens in text for the model; estimated from UTF-8 length without tiktoken"""
+    encoding = _encoding(model)
+    if encoding is not None:
+        return len(encoding.encode(text))
+    # ~4 bytes per token holds for English and errs high for other scripts
+    return math.ceil(len(text.encode("utf-8")) / 4)
+
+
+def count_message_tokens(messages: List[Dict], model: str) -> int:
+    """Prompt tokens of a chat completion request"""
+    return REPLY_OVERHEAD + sum(
+        MESSAGE_OVERHEAD + count_tokens(str(message.get("content", "")), model)
+        for message in messages
+    )
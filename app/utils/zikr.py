@@ -0,0 +1,36 @@
+# Predefined Zikr recommendations by mood/state
+ZIKR_SUGGESTIONS = {
+    "peaceful": [
+        "SubhanAllah (100 times)",
+        "Alhamdulillah (100 times)",
+        "La ilaha illallah (100 times)"
+    ],
+    "anxious": [
+        "La hawla wa la quwwata illa billah",
+        "Hasbunallahu wa ni'mal wakeel (70 times)",
+        "Ayatul Kursi (3 times)"
+    ],
+    "grateful": [
+        "Alhamdulillah (100 times)",
+        "Shukran lillah (continuous)",
+        "Surah Al-Fatihah (7 times)"
+    ],
+    "repentant": [
+        "Astaghfirullah (100 times)",
+        "Rabbi la tazarni fardan (11 times)",
+        "Durood Sharif (100 times)"
+    ],
+    "general": [
+        "SubhanAllah (33 times)",
+        "Alhamdulillah (33 times)",
+        "Allahu Akbar (34 times)"
+    ]
+}
+
+# Suggestions that name a longer text instead of a phrase to repeat, with the
+# audio library item (kind, slug) that recites it, or None if there is none
+ZIKR_REFERENCES = {
+    "Ayatul Kursi": None,
+    "Surah Al-Fatihah": ("fatiha", "arabic"),
+    "Durood Sharif": None
+}
@@ -1,7 +1,23 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
+import asyncio
 from app.api import api_router
 from app.config import settings
+from app.services.http_clients import upstream_clients
+from app.services.openai_service import openai_limiter, close_openai_client, chat_stream_stats
+from app.services.quran_search import get_search_engine
+from app.services.hadith_cache import hadith_book_cache
+from app.services.llm_cache import llm_cache
+from app.services.tts_cache import tts_cache
+from app.services.naseehah_scheduler import naseehah_scheduler
+from app.services.session_store import session_store
+from app.services.gazetteer import gazetteer
+from app.utils.single_flight import single_flight
+from app.utils.tokens import load_encoding
+from app.services.rate_limiter import rate_limiter
+from app.middleware.body_limit import BodySizeLimitMiddleware
+from app.middleware.rate_limit import RateLimitMiddleware
 import logging
 
 # Configure logging
@@ -9,6 +25,43 @@ logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
+logger = logging.getLogger(__name__)
+
+def _log_task_failure(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Background task {task.get_name()} failed: {task.exception()!r}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open shared upstream resources on startup, release them on shutdown"""
+    await upstream_clients.startup()
+    await asyncio.to_thread(llm_cache.purge_expired)
+    await asyncio.to_thread(session_store.purge_expired)
+    await asyncio.to_thread(tts_cache.load)
+    await asyncio.to_thread(load_encoding, settings.OPENAI_MODEL)
+    # City lookups run on the event loop; have the gazetteer ready first
+    await asyncio.to_thread(gazetteer.load)
+    
+    # Build Quran search indexes off the event loop; the reference held here
+    # keeps the task alive, as the loop only holds it weakly
+    search_engine = get_search_engine()
+    warm_task = None
+    if search_engine:
+        warm_task = asyncio.create_task(
+            asyncio.to_thread(search_engine.warm), name="quran-search-warm"
+        )
+        warm_task.add_done_callback(_log_task_failure)
+    
+    # Keep yesterday, today and tomorrow's naseehah generated
+    naseehah_scheduler.start()
+    
+    yield
+    await naseehah_scheduler.stop()
+    await upstream_clients.shutdown()
+    await close_openai_client()
+    llm_cache.close()
+    session_store.close()
+    await rate_limiter.backend.close()
 
 # Create FastAPI app
 app = FastAPI(
@@ -16,7 +69,8 @@ app = FastAPI(
     version=settings.APP_VERSION,
     description="AI-powered Islamic Sufi guidance platform",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -28,6 +82,28 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Reject oversized voice uploads before they are read
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    limits={"/api/voice/chat": settings.VOICE_UPLOAD_MAX_BYTES}
+)
+
+# Per-user rate limits and daily quotas on the endpoints that call OpenAI/ElevenLabs
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(
+        RateLimitMiddleware,
+        limiter=rate_limiter,
+        endpoints={
+            "/api/murshid/chat": "chat",
+            "/api/quran/explain": "explain",
+            "/api/hadith/explain": "explain",
+            "/api/spiritual/advice": "spiritual",
+            "/api/spiritual/meditation": "spiritual",
+            "/api/voice/generate": "voice",
+            "/api/voice/chat": "voice"
+        }
+    )
+
 # Include API routes
 app.include_router(api_router, prefix="/api")
 
@@ -52,6 +128,22 @@ async def health_check():
         "version": settings.APP_VERSION
     }
 
+# Runtime stats
+@app.get("/health/stats")
+async def health_stats():
+    """Connection pool, LLM concurrency and cache usage, for sizing the limits"""
+    return {
+        "upstream_pools": upstream_clients.pool_stats(),
+        "openai": openai_limiter.stats(),
+        "chat_stream": chat_stream_stats(),
+        "hadith_cache": hadith_book_cache.stats(),
+        "llm_cache": llm_cache.stats(),
+        "tts_cache": tts_cache.stats(),
+        "single_flight": single_flight.stats(),
+        "rate_limit": rate_limiter.stats(),
+        "sessions": session_store.stats()
+    }
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -0,0 +1,5 @@
+import os
+
+# Settings require the API keys at import time; tests never call the real services
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("ELEVENLABS_API_KEY", "test")
@@ -0,0 +1,35 @@
+import json
+from datetime import date
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from app.services.prayer_times import prayer_timetable
+
+FIXTURE = json.loads((Path(__file__).parent / "fixtures" / "aladhan_timings.json").read_text())
+
+
+def _minutes(hhmm: str) -> int:
+    hours, minutes = hhmm.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+@pytest.mark.parametrize("case", FIXTURE["cases"], ids=lambda case: case["name"])
+def test_matches_aladhan_within_a_minute(case):
+    timings = prayer_timetable(
+        case["latitude"],
+        case["longitude"],
+        date.fromisoformat(case["date"]),
+        1,
+        ZoneInfo(case["timezone"]),
+        case["method"],
+        case["school"],
+        case["latitude_adjustment"],
+    )[0]["timings"]
+
+    for prayer, expected in case["timings"].items():
+        assert timings[prayer] is not None, prayer
+        # Wrap around midnight so 23:59 vs 00:00 counts as one minute
+        drift = (_minutes(timings[prayer]) - _minutes(expected) + 720) % 1440 - 720
+        assert abs(drift) <= 1, f"{prayer}: {timings[prayer]} vs AlAdhan {expected}"
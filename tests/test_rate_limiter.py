@@ -0,0 +1,174 @@
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import fakeredis
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.middleware.rate_limit import RateLimitMiddleware
+from app.services import rate_limiter as rate_limiter_module
+from app.services.rate_limiter import MemoryRateLimitBackend, RateLimiter, RedisRateLimitBackend
+
+# One minute before midnight UTC, so quota resets are easy to cross
+LATE_EVENING = datetime(2025, 1, 1, 23, 59, tzinfo=timezone.utc).timestamp()
+
+
+def _backend(kind: str, monkeypatch):
+    if kind == "memory":
+        return MemoryRateLimitBackend()
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        rate_limiter_module.redis_asyncio, "from_url",
+        lambda url: fakeredis.FakeAsyncRedis(server=server)
+    )
+    return RedisRateLimitBackend("redis://fake")
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    def set_limits(per_minute: int, daily: int):
+        monkeypatch.setattr(settings, "FREE_TIER_PER_MINUTE", per_minute)
+        monkeypatch.setattr(settings, "FREE_TIER_DAILY_LIMIT", daily)
+    return set_limits
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fake time.time() for the rate limiter module, moved by hand"""
+    clock = SimpleNamespace(now=LATE_EVENING - 3600)
+    monkeypatch.setattr(rate_limiter_module, "time", SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+@pytest.mark.parametrize("kind", ["memory", "redis"])
+def test_bucket_refills_over_time(kind, monkeypatch, limits, clock):
+    limits(per_minute=60, daily=1000)
+    limiter = RateLimiter(_backend(kind, monkeypatch))
+
+    async def run():
+        burst = [await limiter.check("ip:1", "chat") for _ in range(61)]
+        assert all(d.allowed for d in burst[:60])
+        assert burst[59].remaining == 0
+        refused = burst[60]
+        assert not refused.allowed
+        assert refused.retry_after == 1
+        assert refused.quota_remaining == 940
+
+        clock.now += 0.5
+        assert not (await limiter.check("ip:1", "chat")).allowed
+
+        clock.now += 0.5
+        assert (await limiter.check("ip:1", "chat")).allowed
+
+        clock.now += 30
+        decision = await limiter.check("ip:1", "chat")
+        assert decision.allowed
+        assert decision.remaining == 29
+        assert decision.reset == 31
+
+        # Buckets are per endpoint and per user
+        assert (await limiter.check("ip:1", "voice")).remaining == 59
+        assert (await limiter.check("ip:2", "chat")).remaining == 59
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize("kind", ["memory", "redis"])
+def test_daily_quota_resets_at_midnight(kind, monkeypatch, limits, clock):
+    limits(per_minute=60, daily=3)
+    limiter = RateLimiter(_backend(kind, monkeypatch))
+    clock.now = LATE_EVENING
+
+    async def run():
+        assert [(await limiter.check("ip:1", endpoint)).allowed
+                for endpoint in ("chat", "voice", "explain", "chat")] == [True, True, True, False]
+
+        refused = await limiter.check("ip:1", "chat")
+        assert refused.quota_remaining == 0
+        assert refused.quota_reset == 60
+        assert refused.retry_after == 60
+
+        clock.now += 61
+        decision = await limiter.check("ip:1", "chat")
+        assert decision.allowed
+        assert decision.quota_remaining == 2
+
+    asyncio.run(run())
+
+
+def test_backends_agree(monkeypatch):
+    """The Lua script and the memory backend make the same decisions"""
+    # (seconds since start, endpoint) with a 3 request burst, 1 token per
+    # second and a quota of 6
+    hits = [(0, "a"), (0, "a"), (0, "a"), (0, "a"), (0.4, "a"), (1.2, "a"),
+            (1.2, "a"), (1.2, "b"), (50, "a"), (50, "a"), (51, "b")]
+    start = LATE_EVENING - 3600
+
+    async def replay(backend):
+        return [
+            await backend.hit(
+                f"ratelimit:free:{endpoint}:ip:1", 3, 1.0,
+                "quota:2025-01-01:ip:1", "2025-01-01", 6, 3600, start + offset
+            )
+            for offset, endpoint in hits
+        ]
+
+    memory = asyncio.run(replay(_backend("memory", monkeypatch)))
+    redis = asyncio.run(replay(_backend("redis", monkeypatch)))
+
+    assert [allowed for allowed, *_ in memory] == [
+        True, True, True, False, False, True, False, True, True, False, False
+    ]
+    for (m_allowed, m_tokens, m_retry, m_used), (r_allowed, r_tokens, r_retry, r_used) in zip(memory, redis):
+        assert r_allowed == m_allowed
+        assert r_tokens == pytest.approx(m_tokens)
+        assert r_retry == pytest.approx(m_retry)
+        assert r_used == m_used
+
+
+def _client(limiter) -> TestClient:
+    app = FastAPI()
+
+    @app.get("/api/chat")
+    async def chat():
+        return {"ok": True}
+
+    @app.get("/health")
+    async def health():
+        return {"ok": True}
+
+    app.add_middleware(RateLimitMiddleware, limiter=limiter, endpoints={"/api/chat": "chat"})
+    return TestClient(app)
+
+
+def test_middleware_refuses_with_429_and_retry_after(limits):
+    limits(per_minute=2, daily=100)
+    client = _client(RateLimiter(MemoryRateLimitBackend()))
+
+    assert [client.get("/api/chat").headers["x-ratelimit-remaining"] for _ in range(2)] == ["1", "0"]
+
+    response = client.get("/api/chat")
+    assert response.status_code == 429
+    assert response.json() == {"detail": "Rate limit exceeded"}
+    assert 1 <= int(response.headers["retry-after"]) <= 30
+    assert response.headers["x-quota-remaining"] == "98"
+
+    health = client.get("/health")
+    assert health.status_code == 200
+    assert "x-ratelimit-limit" not in health.headers
+
+
+def test_middleware_reports_exhausted_quota(limits):
+    limits(per_minute=60, daily=2)
+    client = _client(RateLimiter(MemoryRateLimitBackend()))
+
+    assert [client.get("/api/chat").status_code for _ in range(2)] == [200, 200]
+
+    response = client.get("/api/chat")
+    assert response.status_code == 429
+    assert response.json() == {"detail": "Daily quota exceeded"}
+    assert response.headers["x-quota-remaining"] == "0"
+    assert response.headers["retry-after"] == response.headers["x-quota-reset"]